@@ -13,31 +13,73 @@ st.set_page_config(
 import os
 os.environ["THINC_OPS"] = "numpy"
 
-import spacy
+import time
 from youtube_videos2 import YouTubeExtractor
+from keyword_cache import KeywordCache
+from local_keywords import LocalKeywordExtractor
 from medical_finder import NearbyMedicalFinder
-
-import folium
-from streamlit_folium import st_folium
+from embedding_provider import CachedEmbeddingProvider, make_provider
+from symptom_gate import SymptomGate, load_ner_pipeline, load_seed_terms
+from orchestrator import SearchOrchestrator
+from semantic_cache import SemanticCache
+from video_catalog import VideoCatalog
+from place_catalog import PlaceCatalog
+from rate_limiter import RateLimiter, CircuitOpenError, is_quota_error
+from service_client import RecommenderClient
+import tracing
+
+import streamlit.components.v1 as components
+from clinic_map import ClinicMapRenderer
 import requests
+from http_client import get_session
 from get_coordinates import get_device_coordinates
 # =========================
 # LOAD spaCy SAFELY
 # =========================
 @st.cache_resource
 def load_spacy_model():
-    return spacy.load("en_ner_bc5cdr_md")
+    return load_ner_pipeline("en_ner_bc5cdr_md")
+
+@st.cache_resource
+def load_symptom_gate():
+    # Shared by all sessions so the memo accumulates; seed terms are verified against NER once
+    return SymptomGate(sci_nlp, seed_terms=load_seed_terms())
 
 sci_nlp = load_spacy_model()
+symptom_gate = load_symptom_gate()
 print("✅ Medical NLP model loaded successfully.")
 # =========================
 # UTILS
 # =========================
 def process_text(text: str) -> bool:
+    started = time.perf_counter()
     if not text or len(text) > 100:
-        return False
-    doc = sci_nlp(text)
-    return any(ent.label_ == "DISEASE" for ent in doc.ents)
+        verdict, source = False, "empty/too long"
+    else:
+        verdict, source = symptom_gate.classify(text)
+    st.session_state.validation_ms = (time.perf_counter() - started) * 1000
+    st.session_state.validation_source = source
+    return verdict
+
+def render_provisional_videos(videos):
+    """Cards for search hits whose views/likes are still being fetched"""
+    for i, video in enumerate(videos, 1):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            if video['thumbnail']:
+                st.markdown(f"""
+                <img src="{video['thumbnail']}" class="thumbnail-img" alt="Video thumbnail">
+                """, unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+            <div class="video-card">
+                <h3 style='color: white; margin: 0;'>📺 {video['title']}</h3>
+                <p style='color: #ccc; font-size: 0.9rem;'>⏳ Ranking by views and likes...</p>
+                <a href="{video['url']}" target="_blank" style='color: #FFD700; font-weight: bold; text-decoration: none;'>
+                    ▶️ Watch on YouTube
+                </a>
+            </div>
+            """, unsafe_allow_html=True)
 
 # Add network connectivity check function
 def check_network_connectivity():
@@ -47,11 +89,13 @@ def check_network_connectivity():
         "https://www.cloudflare.com",
         "https://httpbin.org/get"
     ]
+    # Shared pooled session; a short timeout keeps the offline case quick
+    probe = get_session()
     
     for url in test_urls:
         try:
             # Quick HEAD request (no data transfer)
-            response = requests.head(url, timeout=3)
+            response = probe.head(url, timeout=2)
             if response.status_code < 500:
                 return True
         except:
@@ -125,18 +169,92 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load secrets
-GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-YOUTUBE_API_KEY = st.secrets["YOUTUBE_API_KEY"]
-GOOGLE_MAPS_API_KEY = st.secrets["GOOGLE_MAPS_API_KEY"]
+# RECOMMENDER_URL set -> thin client of service.py, API keys live on the service
+RECOMMENDER_URL = st.secrets.get("RECOMMENDER_URL")
+if not RECOMMENDER_URL:
+    GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
+    YOUTUBE_API_KEY = st.secrets["YOUTUBE_API_KEY"]
+    GOOGLE_MAPS_API_KEY = st.secrets["GOOGLE_MAPS_API_KEY"]
 
 # Initialize
 @st.cache_resource
-def init_youtube():
-    return YouTubeExtractor(GEMINI_API_KEY, YOUTUBE_API_KEY)
+def init_http():
+    # Shared keep-alive session; HTTP_POOL_SIZE = connections kept per host
+    return get_session(st.secrets.get("HTTP_POOL_SIZE"))
+
+@st.cache_resource
+def init_rate_limiter():
+    # One limiter for every session. Optional secrets tables, e.g.
+    #   [RATE_LIMITS]   gemini = 2, youtube = 5, places = 10   (calls/s)
+    #   [DAILY_BUDGETS] youtube = 10000                        (quota units/day)
+    limiter = RateLimiter(dict(st.secrets.get("RATE_LIMITS", {})), dict(st.secrets.get("DAILY_BUDGETS", {})))
+    tracing.registry.add_collector(limiter.render_prometheus)
+    return limiter
 
 @st.cache_resource
 def init_medical():
-    return NearbyMedicalFinder(GOOGLE_MAPS_API_KEY)
+    # Set EMBEDDING_CACHE_DIR to keep place/title embeddings on disk
+    # EMBEDDING_BACKEND: torch (default) | onnx | onnx-int8 (CPU nodes: no torch, far less RSS)
+    backend = st.secrets.get("EMBEDDING_BACKEND", "torch")
+    store_dir = st.secrets.get("EMBEDDING_CACHE_DIR")
+    if store_dir and backend != "torch":
+        store_dir = os.path.join(store_dir, backend)  # vectors from different backends never mix
+    embedder = CachedEmbeddingProvider(make_provider(backend), store_dir=store_dir)
+    # Every place seen is kept on a geohash grid; areas searched recently are answered
+    # locally. PLACE_CATALOG_DB keeps the catalog across restarts
+    place_catalog = PlaceCatalog(db_path=st.secrets.get("PLACE_CATALOG_DB"))
+    tracing.registry.add_collector(place_catalog.render_prometheus)
+    finder = NearbyMedicalFinder(GOOGLE_MAPS_API_KEY, session=init_http(), embedder=embedder,
+                                 rate_limiter=init_rate_limiter(), place_catalog=place_catalog)
+    # Load MiniLM (+ pinned topic vectors) off the main thread so the first page renders without it
+    finder.embedder.warm_up(background=True)
+    return finder
+
+@st.cache_resource
+def init_youtube():
+    # Shared by every session; set KEYWORD_CACHE_DB to persist across restarts
+    keyword_cache = KeywordCache(db_path=st.secrets.get("KEYWORD_CACHE_DB"))
+    # KEYWORD_ENGINE: gemini | local | local_first | fallback (local keywords when Gemini fails)
+    engine = st.secrets.get("KEYWORD_ENGINE", "fallback")
+    local_extractor = LocalKeywordExtractor(sci_nlp) if engine != "gemini" else None
+    # Past results answer well-covered queries without a YouTube search;
+    # VIDEO_CATALOG_DB keeps the catalog (and title embeddings) across restarts
+    video_catalog = VideoCatalog(init_medical().embedder, db_path=st.secrets.get("VIDEO_CATALOG_DB"))
+    return YouTubeExtractor(GEMINI_API_KEY, YOUTUBE_API_KEY, keyword_cache,
+                            rate_limiter=init_rate_limiter(),
+                            keyword_engine=engine, local_extractor=local_extractor,
+                            video_catalog=video_catalog)
+
+@st.cache_resource
+def init_tracing():
+    # TRACE_LOG: JSON span log file ("-" for stderr); METRICS_PORT: Prometheus /metrics
+    trace_log = st.secrets.get("TRACE_LOG")
+    if trace_log:
+        tracing.enable_json_logs(None if trace_log == "-" else trace_log)
+    metrics_port = st.secrets.get("METRICS_PORT")
+    if metrics_port:
+        tracing.start_metrics_server(int(metrics_port))
+    return True
+
+init_tracing()
+
+@st.cache_resource
+def init_orchestrator():
+    # Near-duplicate queries ("pain in my chest" / "chest pains") reuse earlier results;
+    # SEMANTIC_CACHE_THRESHOLD is the cosine similarity needed (0 disables)
+    finder = init_medical()
+    threshold = float(st.secrets.get("SEMANTIC_CACHE_THRESHOLD", 0.9))
+    semantic_cache = SemanticCache(finder.embedder, threshold=threshold) if threshold > 0 else None
+    return SearchOrchestrator(init_youtube(), finder, semantic_cache=semantic_cache)
+
+@st.cache_resource
+def init_map_renderer():
+    # MAP_RENDERER: "markers" (folium marker per clinic) or "geojson" (one lean layer)
+    return ClinicMapRenderer(st.secrets.get("MAP_RENDERER", "markers"))
+
+@st.cache_resource
+def init_client():
+    return RecommenderClient(RECOMMENDER_URL, session=init_http())
 
 # Check network connectivity ONCE at startup
 if 'network_checked' not in st.session_state:
@@ -145,9 +263,14 @@ if 'network_checked' not in st.session_state:
         st.session_state.network_checked = True
 
 # Only initialize if network is OK
-if st.session_state.network_ok:
+if st.session_state.network_ok and RECOMMENDER_URL:
+    # Same stream/search/recommend_care interface, served over HTTP
+    yt_extractor = None
+    medical_finder = orchestrator = init_client()
+elif st.session_state.network_ok:
     yt_extractor = init_youtube()
     medical_finder = init_medical()
+    orchestrator = init_orchestrator()
 else:
     # Show warning but don't crash
     st.markdown("""
@@ -159,6 +282,7 @@ else:
     # Create dummy objects to prevent crashes
     yt_extractor = None
     medical_finder = None
+    orchestrator = None
 
 # Rest of your code continues...
 # Cache videos in session state
@@ -174,6 +298,11 @@ if 'cached_medical_keywords' not in st.session_state:
     
 if 'cached_clinics' not in st.session_state:
     st.session_state.cached_clinics = None
+# Clinics prefetched alongside videos (resolved when CLINICS tab opens)
+if 'clinics_future' not in st.session_state:
+    st.session_state.clinics_future = None
+if 'stage_timings' not in st.session_state:
+    st.session_state.stage_timings = {}
 
 # Header
 st.markdown(
@@ -207,6 +336,31 @@ if not process_text(symptoms):
         symptoms = ""
         # st.session_state.cached_videos = []
 
+if st.secrets.get("SHOW_DEBUG_PANEL", False):
+    with st.expander("🛠️ Debug"):
+        st.write(f"Symptom validation: {st.session_state.validation_ms:.2f} ms "
+                 f"({st.session_state.validation_source})")
+        st.json(symptom_gate.stats())
+        if st.session_state.get("stage_timings"):
+            st.write("Search stage timings (s)")
+            st.json(st.session_state.stage_timings)
+        semantic_cache = getattr(orchestrator, "semantic_cache", None)
+        if semantic_cache is not None:
+            st.write("Semantic query cache")
+            st.json(semantic_cache.stats())
+        if not RECOMMENDER_URL:
+            st.write("Local video catalog")
+            st.json(init_youtube().video_catalog.stats())
+            st.write("Local place catalog")
+            st.json(init_medical().place_catalog.stats())
+        st.write("Clinic map rendering")
+        st.json(init_map_renderer().stats())
+        if not RECOMMENDER_URL:
+            st.write("Upstream API budget / circuit state")
+            st.json(init_rate_limiter().usage())
+        st.write("Span latency (process-wide)")
+        st.json(tracing.registry.summary())
+
 #////////////////////////////////////////
 # GPS Button Locking
 if "gps_locked" not in st.session_state:
@@ -265,26 +419,55 @@ if search_clicked or symptoms:
             yt_keywords = []
             medical_keywords = []
             clinics = []  # Add this!
+            # Provisional video cards are drawn here while stats load
+            stream_area = st.empty()
             
             try:
                 with st.spinner(" Analyzing Symptoms"):
-                    videos, yt_keywords, medical_keywords = yt_extractor.symptom_to_videos(symptoms)
+                    # Clinics start as soon as keywords are back (if we already have GPS)
+                    result = None
+                    for stage, payload in orchestrator.stream(
+                        symptoms,
+                        st.session_state.get('current_lat'),
+                        st.session_state.get('current_lng')
+                    ):
+                        if stage == "provisional" and st.session_state.active_tab == "videos":
+                            with stream_area.container():
+                                render_provisional_videos(payload)
+                        elif stage == "done":
+                            result = payload
+                    videos = result.videos
+                    yt_keywords = result.youtube_keywords
+                    medical_keywords = result.medical_keywords
                     # Cache ALL results
                     st.session_state.cached_clinics = None
+                    st.session_state.clinics_future = result.clinics_future
+                    st.session_state.stage_timings = result.timings
                     st.session_state.cached_videos = videos
                     st.session_state.cached_keywords = yt_keywords
                     st.session_state.cached_medical_keywords = medical_keywords
                     st.session_state.last_query = symptoms
           
+            except CircuitOpenError as e:
+                # Upstream already known to be down/out of quota: answer at once instead of waiting
+                st.error("⏳ **Service Busy** 😔")
+                st.info(f"**We are sorry for the inconvenience. Our {e.api} service is temporarily unavailable. "
+                        f"Please try again in about {max(1, round(e.retry_in / 60))} minute(s).**")
+                st.session_state.cached_videos = []
+                st.session_state.cached_clinics = None
+                st.session_state.clinics_future = None
+                videos = []
+
             except requests.exceptions.SSLError:
                 st.error("🔒 **SSL Connection Issue** 😅")
                 st.info("👉 **Would you mind clicking the search button again please?** 🙏")
                 st.session_state.cached_videos = []
                 st.session_state.cached_clinics = None
+                st.session_state.clinics_future = None
                 videos = []  # CRITICAL: Set videos to empty list
                 
             except requests.exceptions.HTTPError as e:
-                if "quota" in str(e).lower() or "429" in str(e):
+                if is_quota_error(e):
                     st.error("⏳ **Service Busy** 😔")
                     st.info("**We are sorry for the inconvenience. We have exceeded the maximum number of requests we could handle. Please try a little later.**")
                 else:
@@ -292,15 +475,24 @@ if search_clicked or symptoms:
                     st.info("👉 **Please click SEARCH again!**")
                 st.session_state.cached_videos = []
                 st.session_state.cached_clinics = None
+                st.session_state.clinics_future = None
                 videos = []  # CRITICAL: Set videos to empty list
                 
             except Exception as e:
-                st.error("⚠️ **Oops! Something went wrong** ")
-                st.info("👉 **Would you mind clicking SEARCH again?** 🙏")
+                # googleapiclient / google.api_core errors are not requests.HTTPError
+                if is_quota_error(e):
+                    st.error("⏳ **Service Busy** 😔")
+                    st.info("**We are sorry for the inconvenience. We have exceeded the maximum number of requests we could handle. Please try a little later.**")
+                else:
+                    st.error("⚠️ **Oops! Something went wrong** ")
+                    st.info("👉 **Would you mind clicking SEARCH again?** 🙏")
                 print(f"DEBUG ERROR: {e}")
                 st.session_state.cached_videos = []
                 st.session_state.cached_clinics = None
+                st.session_state.clinics_future = None
                 videos = []  # CRITICAL: Set videos to empty list
+            finally:
+                stream_area.empty()
         else:
             # Use cached results
             videos = st.session_state.cached_videos or []
@@ -405,6 +597,17 @@ if search_clicked or symptoms:
                 elif medical_keywords and st.session_state.cached_clinics:
                     # Use cached clinics
                     clinics = st.session_state.cached_clinics
+                elif medical_keywords and st.session_state.clinics_future is not None:
+                    # Prefetched during the video search - usually already done
+                    with st.spinner("🔍 Finding clinics near you..."):
+                        try:
+                            clinics = st.session_state.clinics_future.result()
+                        except Exception as e:
+                            print(f"DEBUG ERROR: {e}")
+                            clinics = []
+                    st.session_state.clinics_future = None
+                    st.session_state.cached_clinics = clinics
+                    st.success(f"📍 Searched around {lat:.4f}, {lng:.4f}")
                 elif medical_keywords:
                     # Generate clinics ONCE
                     symptoms_list = symptoms.split()
@@ -454,39 +657,16 @@ if search_clicked or symptoms:
                             """, unsafe_allow_html=True)
                         st.divider()
                     
-                    # Create Folium map (centered)
+                    # Map (centered) - HTML is memoized per clinic set + centre, so
+                    # reruns with unchanged clinics skip rebuilding folium entirely
                     # Use session state coordinates if available, otherwise use the defaults
                     center_lat = st.session_state.get('current_lat', lat)
                     center_lng = st.session_state.get('current_lng', lng)
-                    
-                    m = folium.Map(
-                        location=[center_lat, center_lng],
-                        zoom_start=13,
-                        tiles="OpenStreetMap"
-                    )
-                    
-                    # 🔴 RED USER LOCATION (priority)
+                    user_location = None
                     if 'current_lat' in st.session_state:
-                        folium.Marker(
-                            [st.session_state.current_lat, st.session_state.current_lng],
-                            popup="📍 YOU ARE HERE",
-                            tooltip="Your Location",
-                            icon=folium.Icon(color="red", icon="user", prefix="fa")
-                        ).add_to(m)
+                        user_location = (st.session_state.current_lat, st.session_state.current_lng)
                     
-                    # 🔵 BLUE CLINIC MARKERS
-                    for i, clinic in enumerate(clinics, 1):
-                        folium.Marker(
-                            [clinic.lat, clinic.lng],
-                            popup=f"""
-                            <b>#{i} {clinic.name}</b><br>
-                            ⭐ {clinic.rating} ({clinic.user_ratings_total} reviews)<br>
-                            📏 {clinic.distance_m}m | Match: {clinic.match_percent}%<br>
-                            📍 {clinic.address[:60]}...
-                            """,
-                            tooltip=f"#{i} {clinic.name}",
-                            icon=folium.Icon(color="blue", icon="hospital", prefix="fa")
-                        ).add_to(m)
+                    map_html = init_map_renderer().render(clinics, (center_lat, center_lng), user_location)
                     
                     st.markdown(
                         """
@@ -494,7 +674,7 @@ if search_clicked or symptoms:
                         """, 
                         unsafe_allow_html=True
                     )
-                    st_folium(m, width=900, height=500, returned_objects=[])
+                    components.html(map_html, width=900, height=500)
                     st.markdown("</div>", unsafe_allow_html=True)
 
     else:
@@ -0,0 +1,194 @@
+"""Headless batch recommendations over many symptom queries.
+
+Reads queries from JSONL ({"query": ..., "lat": ..., "lng": ..., "id": ...})
+or CSV (same column names; only "query" is required) and streams one JSON
+result per line. Results already in the output file are skipped, so re-running
+the same command after a crash resumes where it stopped (failed queries are
+retried and their earlier error records dropped).
+
+    GEMINI_API_KEY=... YOUTUBE_API_KEY=... GOOGLE_MAPS_API_KEY=... \\
+    python batch_recommend.py queries.jsonl -o results.jsonl --concurrency 8 --gemini-rps 2
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, Set
+
+from youtube_videos2 import YouTubeExtractor
+from medical_finder import NearbyMedicalFinder
+from orchestrator import SearchOrchestrator
+from keyword_cache import KeywordCache
+from rate_limiter import RateLimiter, GEMINI, YOUTUBE, PLACES
+from local_keywords import ENGINES
+from semantic_cache import SemanticCache
+from video_catalog import VideoCatalog
+from place_catalog import PlaceCatalog
+
+
+def read_queries(path: str) -> Iterator[Dict]:
+    """Yield {"id", "query", "lat", "lng"}; id defaults to the 1-based row number"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows, 1):
+            query = (row.get("query") or "").strip()
+            if not query:
+                continue
+            lat, lng = row.get("lat"), row.get("lng")
+            yield {
+                "id": str(row.get("id") or n),
+                "query": query,
+                "lat": float(lat) if lat not in (None, "") else None,
+                "lng": float(lng) if lng not in (None, "") else None,
+            }
+
+
+def prepare_checkpoint(path: str) -> Set[str]:
+    """IDs already written to the output (the checkpoint).
+
+    Rewrites the output without the half-written last line of a crash (the
+    next record would otherwise be appended onto it and lost) and without
+    error records, whose queries are retried and written again.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as f:
+        data = f.read()
+    kept = []
+    complete = data[:data.rfind(b"\n") + 1]
+    for line in complete.splitlines(keepends=True):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "error" not in record:
+            done.add(str(record["id"]))
+            kept.append(line)
+    kept_data = b"".join(kept)
+    if kept_data != data:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(kept_data)
+        os.replace(tmp_path, path)
+    return done
+
+
+def recommend_one(orchestrator: SearchOrchestrator, item: Dict, with_clinics: bool) -> Dict:
+    started = time.perf_counter()
+    record = {"id": item["id"], "query": item["query"]}
+    try:
+        lat, lng = (item["lat"], item["lng"]) if with_clinics else (None, None)
+        result = orchestrator.search(item["query"], lat, lng)
+        clinics = result.clinics()
+        record.update({
+            "youtube_keywords": result.youtube_keywords,
+            "medical_keywords": result.medical_keywords,
+            "videos": [v.to_dict() for v in result.videos],
+            "clinics": [c.to_dict() for c in clinics] if clinics is not None else None,
+            "timings": result.timings,
+        })
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def run_batch(orchestrator: SearchOrchestrator, input_path: str, output_path: str,
+              concurrency: int = 4, with_clinics: bool = True) -> Dict[str, int]:
+    done = prepare_checkpoint(output_path)
+    counts = {"skipped": 0, "ok": 0, "failed": 0}
+    write_lock = threading.Lock()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        def write(record: Dict):
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["failed" if "error" in record else "ok"] += 1
+                status = "❌" if "error" in record else "✅"
+                print(f"{status} [{record['id']}] {record['query'][:50]} ({record['elapsed_s']}s)",
+                      file=sys.stderr)
+
+        # Keep at most 2x concurrency queries in flight so huge inputs stream
+        in_flight = set()
+        for item in read_queries(input_path):
+            if item["id"] in done:
+                counts["skipped"] += 1
+                continue
+            if len(in_flight) >= 2 * concurrency:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+            in_flight.add(executor.submit(recommend_one, orchestrator, item, with_clinics))
+        for future in wait(in_flight).done:
+            write(future.result())
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="queries as .jsonl or .csv")
+    parser.add_argument("-o", "--output", required=True, help="results .jsonl (appended; doubles as checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--gemini-rps", type=float, default=1.0, help="max Gemini calls per second")
+    parser.add_argument("--youtube-rps", type=float, default=5.0, help="max YouTube API calls per second")
+    parser.add_argument("--places-rps", type=float, default=10.0, help="max Places API calls per second")
+    parser.add_argument("--youtube-daily-units", type=float, default=0,
+                        help="stop calling YouTube after this many quota units today (0 = no cap)")
+    parser.add_argument("--no-clinics", action="store_true", help="skip Places even when coordinates are given")
+    parser.add_argument("--keyword-cache-db", help="SQLite file for the keyword cache (shared with the app)")
+    parser.add_argument("--semantic-threshold", type=float, default=0.0,
+                        help="reuse results of earlier queries at least this similar (0 = off, e.g. 0.9)")
+    parser.add_argument("--keyword-engine", choices=ENGINES, default="fallback",
+                        help="where keywords come from (local = offline specialty map, no Gemini)")
+    parser.add_argument("--video-catalog-db",
+                        help="SQLite video catalog (shared with the app); well-covered queries skip YouTube search")
+    parser.add_argument("--place-catalog-db",
+                        help="SQLite place catalog (shared with the app); covered areas skip the Places API")
+    args = parser.parse_args()
+
+    limiter = RateLimiter({GEMINI: args.gemini_rps, YOUTUBE: args.youtube_rps, PLACES: args.places_rps},
+                          daily_budgets={YOUTUBE: args.youtube_daily_units})
+    place_catalog = PlaceCatalog(db_path=args.place_catalog_db) if args.place_catalog_db else None
+    finder = NearbyMedicalFinder(os.environ["GOOGLE_MAPS_API_KEY"], rate_limiter=limiter,
+                                 place_catalog=place_catalog)
+    video_catalog = None
+    if args.video_catalog_db:
+        finder.embedder.warm_up(background=False)
+        video_catalog = VideoCatalog(finder.embedder, db_path=args.video_catalog_db)
+    extractor = YouTubeExtractor(
+        os.environ["GEMINI_API_KEY"], os.environ["YOUTUBE_API_KEY"],
+        KeywordCache(db_path=args.keyword_cache_db), rate_limiter=limiter,
+        keyword_engine=args.keyword_engine, video_catalog=video_catalog,
+    )
+    semantic_cache = None
+    if args.semantic_threshold > 0:
+        finder.embedder.warm_up(background=False)
+        semantic_cache = SemanticCache(finder.embedder, threshold=args.semantic_threshold, max_entries=4096)
+    orchestrator = SearchOrchestrator(extractor, finder, max_workers=args.concurrency,
+                                      semantic_cache=semantic_cache)
+
+    counts = run_batch(orchestrator, args.input, args.output, args.concurrency, not args.no_clinics)
+    print(f"📦 Done: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} already done",
+          file=sys.stderr)
+    if semantic_cache is not None:
+        print(f"🧠 Semantic cache: {semantic_cache.stats()}", file=sys.stderr)
+    if video_catalog is not None:
+        print(f"📼 Video catalog: {video_catalog.stats()}", file=sys.stderr)
+    if place_catalog is not None:
+        print(f"🗺️ Place catalog: {place_catalog.stats()}", file=sys.stderr)
+    print(f"🚦 Upstream usage: {json.dumps(limiter.usage())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Embedding backends compared: load time, latency, throughput, peak RSS and parity.
+
+Each backend runs in a fresh interpreter (so RSS is its own, torch included
+or not) over the corpus symptoms, the shipped vocabulary and the recorded
+place texts. Embeddings are then compared with the reference backend: cosine
+per text and agreement of the top-5 vocabulary/place matches per symptom.
+
+    python benchmarks/embedding_benchmark.py
+    python benchmarks/embedding_benchmark.py --backends torch,onnx-int8 --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import replay
+from embedding_provider import BACKENDS, load_vocabulary, make_provider
+
+# Lowest per-text cosine to the reference that still counts as parity
+PARITY_MIN_COSINE = {"torch": 0.9999, "onnx": 0.999, "onnx-int8": 0.97}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1e6
+        except ImportError:
+            return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3  # bytes on macOS, KB elsewhere
+
+
+def benchmark_texts(corpus_path):
+    """(symptom queries, candidate texts): what score_places embeds per search"""
+    queries = replay.load_corpus(corpus_path)
+    places = replay.load_fixtures()["places"]
+    place_texts = {
+        f"{p['displayName']['text']} {' '.join(p.get('types', []))}"
+        for table in places.values() for payload in table.values() for p in (payload or {}).get("places", [])
+    }
+    return queries, load_vocabulary() + sorted(place_texts)
+
+
+def worker(backend, corpus_path, repeat, out_path):
+    """Runs in the child interpreter; prints one JSON line of measurements"""
+    queries, candidates = benchmark_texts(corpus_path)
+    texts = queries + candidates
+    started = time.perf_counter()
+    provider = make_provider(backend)
+    provider.warm_up(background=False)
+    load_s = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeat):
+        for text in queries:
+            started = time.perf_counter()
+            provider.encode(text)
+            latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        embeddings = np.asarray(provider.encode(texts), dtype=np.float32)
+    batch_s = (time.perf_counter() - started) / repeat
+
+    np.save(out_path, embeddings)
+    ordered = sorted(latencies)
+    print(json.dumps({
+        "load_s": load_s,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "texts_per_s": len(texts) / batch_s,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def run_backend(backend, corpus_path, repeat, out_path):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", backend, "--corpus", corpus_path,
+         "--repeat", str(repeat), "--out", out_path],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        reason = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        print(f"⏭️ {backend} skipped: {reason}")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parity(embeddings, reference, n_queries, k=5):
+    """Per-text cosine to the reference + mean top-k overlap of query -> candidate rankings"""
+    unit = lambda m: m / np.linalg.norm(m, axis=1, keepdims=True)
+    embeddings, reference = unit(embeddings), unit(reference)
+    cosines = (embeddings * reference).sum(axis=1)
+
+    def top_k(m):
+        sims = m[:n_queries] @ m[n_queries:].T
+        return np.argsort(-sims, axis=1, kind="stable")[:, :k]
+
+    ours, theirs = top_k(embeddings), top_k(reference)
+    overlap = statistics.fmean(len(set(a) & set(b)) / k for a, b in zip(ours.tolist(), theirs.tolist()))
+    return float(cosines.min()), float(cosines.mean()), overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"comma-separated subset of {BACKENDS}")
+    parser.add_argument("--reference", default="torch", help="backend the others must match")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus", default=os.path.join(replay.FIXTURES_DIR, "symptoms.txt"))
+    parser.add_argument("--check", action="store_true", help="exit 1 if a backend misses its parity bound")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.corpus, args.repeat, args.out)
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if args.reference not in backends:
+        backends.insert(0, args.reference)
+    queries, candidates = benchmark_texts(args.corpus)
+    n_texts = len(queries) + len(candidates)
+
+    results, embeddings = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            result = run_backend(backend, args.corpus, args.repeat, out_path)
+            if result is not None:
+                results[backend] = result
+                embeddings[backend] = np.load(out_path)
+
+    print(f"🧮 {n_texts} texts ({len(queries)} queries), {args.repeat} repeats, reference={args.reference}")
+    header = (f"{'backend':10s} {'load s':>7s} {'p50 ms':>7s} {'p95 ms':>7s} {'texts/s':>8s} {'RSS MB':>7s} "
+              f"{'min cos':>8s} {'mean cos':>8s} {'top5':>5s}")
+    print(header)
+    print("-" * len(header))
+    failed = []
+    reference = embeddings.get(args.reference)
+    for backend, r in results.items():
+        line = (f"{backend:10s} {r['load_s']:7.2f} {r['p50_ms']:7.2f} {r['p95_ms']:7.2f} "
+                f"{r['texts_per_s']:8.1f} {r['peak_rss_mb']:7.0f}")
+        if reference is not None and backend != args.reference:
+            min_cos, mean_cos, overlap = parity(embeddings[backend], reference, len(queries))
+            ok = min_cos >= PARITY_MIN_COSINE.get(backend, 0.99)
+            if not ok:
+                failed.append(backend)
+            line += f" {min_cos:8.4f} {mean_cos:8.4f} {overlap:5.2f} {'✅' if ok else '❌'}"
+        print(line)
+
+    if reference is None:
+        print(f"⚠️ Reference backend {args.reference} unavailable, parity not checked")
+    if failed:
+        print(f"❌ Below parity bound: {', '.join(failed)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Clinic map rendering: per-marker folium map vs a single GeoJSON layer, plus memo hits.
+
+Clinics come from the recorded Places fixtures. For each renderer, reports the
+cold build time (what every Streamlit rerun used to pay), the memoized rerun
+time and the HTML payload sent to the browser.
+
+    python benchmarks/map_benchmark.py --reruns 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import replay
+from pipeline_benchmark import DEFAULT_LAT, DEFAULT_LNG, HashingEmbeddingProvider, build_pipeline
+
+
+def collect_clinic_sets(corpus):
+    extractor, finder = build_pipeline(replay.load_fixtures(), 0.0, HashingEmbeddingProvider())
+    clinic_sets = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in corpus:
+            _, _, medical_keywords = extractor.symptom_to_videos(query)
+            clinics = finder.recommend_care(query.split(), medical_keywords, DEFAULT_LAT, DEFAULT_LNG)
+            if clinics:
+                clinic_sets.append(clinics)
+    return clinic_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=50, help="memoized renders per clinic set")
+    parser.add_argument("--corpus", default=os.path.join(replay.FIXTURES_DIR, "symptoms.txt"))
+    args = parser.parse_args()
+
+    try:
+        from clinic_map import RENDERERS, ClinicMapRenderer
+    except ImportError as e:
+        print(f"⚠️ folium is required for this benchmark: {e}")
+        return
+
+    clinic_sets = collect_clinic_sets(replay.load_corpus(args.corpus))
+    if not clinic_sets:
+        print("⚠️ No clinics in the recorded fixtures")
+        return
+    center = (DEFAULT_LAT, DEFAULT_LNG)
+
+    print(f"🗺️ {len(clinic_sets)} clinic sets, {args.reruns} reruns each")
+    print(f"{'renderer':10s} {'cold ms':>9s} {'rerun ms':>9s} {'payload KB':>11s}")
+    for name in RENDERERS:
+        renderer = ClinicMapRenderer(name)
+        cold, warm, sizes = [], [], []
+        for clinics in clinic_sets:
+            started = time.perf_counter()
+            html = renderer.render(clinics, center, center)
+            cold.append(time.perf_counter() - started)
+            sizes.append(len(html.encode("utf-8")))
+            for _ in range(args.reruns):
+                started = time.perf_counter()
+                renderer.render(clinics, center, center)
+                warm.append(time.perf_counter() - started)
+        print(f"{name:10s} {statistics.mean(cold) * 1000:9.2f} {statistics.mean(warm) * 1000:9.3f} "
+              f"{statistics.mean(sizes) / 1024:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
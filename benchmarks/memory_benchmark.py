@@ -0,0 +1,124 @@
+"""Per-session memory of cached search results: legacy dicts vs compact result types.
+
+Every simulated session holds what app.py keeps in st.session_state after a
+search (videos, both keyword lists, clinics), decoded from its own copy of the
+data as if it had come from its own API responses. Compares the old shapes
+(video dicts, CarePlace with url string + keyword list) with VideoResult /
+slotted CarePlace (derived URLs, interned keywords), plus serialized sizes.
+
+    python benchmarks/memory_benchmark.py --sessions 500
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import pickle
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import replay
+from pipeline_benchmark import DEFAULT_LAT, DEFAULT_LNG, HashingEmbeddingProvider, build_pipeline
+from medical_finder import CarePlace
+from results import VideoResult, intern_all, pack, msgpack
+
+
+@dataclass
+class LegacyCarePlace:
+    """CarePlace as it was: no slots, stored url, keyword list"""
+    name: str
+    address: str
+    rating: float
+    user_ratings_total: int
+    distance_m: float
+    match_percent: float
+    place_id: str
+    url: str
+    lat: float
+    lng: float
+    matched_keywords: List[str]
+
+
+def collect_results(corpus):
+    """One replayed search per query -> legacy-shaped dicts (the 'API payload')"""
+    extractor, finder = build_pipeline(replay.load_fixtures(), 0.0, HashingEmbeddingProvider())
+    payloads = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in corpus:
+            videos, youtube_keywords, medical_keywords = extractor.symptom_to_videos(query)
+            clinics = finder.recommend_care(query.split(), medical_keywords, DEFAULT_LAT, DEFAULT_LNG)
+            payloads.append({
+                "videos": [v.to_dict() for v in videos],
+                "youtube_keywords": list(youtube_keywords),
+                "medical_keywords": list(medical_keywords),
+                "clinics": [c.to_dict() for c in clinics],
+            })
+    return payloads
+
+
+def legacy_session(payload):
+    return {
+        "cached_videos": payload["videos"],
+        "cached_keywords": payload["youtube_keywords"],
+        "cached_medical_keywords": payload["medical_keywords"],
+        "cached_clinics": [LegacyCarePlace(**c) for c in payload["clinics"]],
+    }
+
+
+def compact_session(payload):
+    return {
+        "cached_videos": [VideoResult.from_dict(v) for v in payload["videos"]],
+        "cached_keywords": intern_all(payload["youtube_keywords"]),
+        "cached_medical_keywords": intern_all(payload["medical_keywords"]),
+        "cached_clinics": [CarePlace.from_dict(c) for c in payload["clinics"]],
+    }
+
+
+def measure(build, blobs, sessions):
+    """Bytes retained per session (tracemalloc, after the raw payload is dropped)"""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    kept = []
+    for i in range(sessions):
+        payload = pickle.loads(blobs[i % len(blobs)])  # fresh strings, like a new API response
+        kept.append(build(payload))
+        del payload
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - baseline) / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--corpus", default=os.path.join(replay.FIXTURES_DIR, "symptoms.txt"))
+    args = parser.parse_args()
+
+    payloads = collect_results(replay.load_corpus(args.corpus))
+    blobs = [pickle.dumps(p) for p in payloads]
+
+    legacy = measure(legacy_session, blobs, args.sessions)
+    compact = measure(compact_session, blobs, args.sessions)
+
+    compact_sessions = [compact_session(p) for p in payloads]
+    json_bytes = sum(len(json.dumps(p, ensure_ascii=False).encode("utf-8")) for p in payloads) / len(payloads)
+    packed_bytes = sum(len(pack(s)) for s in compact_sessions) / len(payloads)
+
+    print(f"🧠 {args.sessions} sessions, {len(payloads)} distinct searches")
+    print(f"{'representation':18s} {'KB/session':>11s}")
+    print(f"{'legacy dicts':18s} {legacy / 1024:11.1f}")
+    print(f"{'compact types':18s} {compact / 1024:11.1f}   ({1 - compact / legacy:.0%} smaller)")
+    print(f"\nSerialized per search: JSON dicts {json_bytes / 1024:.1f} KB, "
+          f"{'msgpack' if msgpack is not None else 'JSON'} rows {packed_bytes / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Offline benchmark of the recommendation pipeline against recorded API fixtures.
+
+Runs every query in the corpus through each stage with replayed Gemini,
+YouTube and Places responses (no keys, no network) and reports throughput,
+latency percentiles and peak traced memory per stage.
+
+    python benchmarks/pipeline_benchmark.py --repeat 3
+    python benchmarks/pipeline_benchmark.py --stages videos,places --latency-ms 50
+    python benchmarks/pipeline_benchmark.py --stages search --latency-ms 300   # streamed Gemini overlap
+    python benchmarks/pipeline_benchmark.py --embedder hash      # no MiniLM download
+    python benchmarks/pipeline_benchmark.py --record             # refresh fixtures (live keys in env)
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import replay
+from embedding_provider import EmbeddingProvider, LazySentenceTransformerProvider, CachedEmbeddingProvider
+from keyword_cache import KeywordCache
+from place_cache import PlaceResultCache
+
+STAGES = ("validation", "keywords_local", "videos", "places", "scoring", "search")
+# Fixture places sit around Durgapur
+DEFAULT_LAT, DEFAULT_LNG = 23.5224, 87.3233
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Deterministic bag-of-words vectors; lets scoring run without MiniLM"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        vector[0] += 1e-3  # never all-zero
+        return vector
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self._one(texts)
+        return np.stack([self._one(t) for t in texts])
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_stage(name, fn, inputs, repeat, quiet=True):
+    """Timing pass (no tracemalloc overhead), then one traced pass for peak memory"""
+    sink = io.StringIO() if quiet else None
+    redirect = (lambda: contextlib.redirect_stdout(sink)) if quiet else contextlib.nullcontext
+
+    latencies = []
+    with redirect():
+        wall_started = time.perf_counter()
+        for _ in range(repeat):
+            for item in inputs:
+                started = time.perf_counter()
+                fn(item)
+                latencies.append(time.perf_counter() - started)
+        wall = time.perf_counter() - wall_started
+
+        tracemalloc.start()
+        for item in inputs:
+            fn(item)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    return {
+        "stage": name,
+        "n": len(latencies),
+        "ops_per_s": len(latencies) / wall if wall else float("inf"),
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def print_report(rows):
+    header = f"{'stage':14s} {'n':>5s} {'ops/s':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'mean ms':>9s} {'peak MB':>8s}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['stage']:14s} {r['n']:5d} {r['ops_per_s']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['mean_ms']:9.2f} {r['peak_mb']:8.2f}")
+
+
+def build_pipeline(fixtures, latency, embedder):
+    from youtube_videos2 import YouTubeExtractor
+    from medical_finder import NearbyMedicalFinder
+
+    # max_entries=0 disables the shared caches so every call does the full work
+    extractor = YouTubeExtractor(
+        None, None, KeywordCache(max_entries=0),
+        model=replay.ReplayGeminiModel(fixtures, latency),
+        youtube=replay.ReplayYouTube(fixtures, latency),
+    )
+    finder = NearbyMedicalFinder(
+        "replay", session=replay.ReplayPlacesSession(fixtures, latency),
+        embedder=embedder, place_cache=PlaceResultCache(max_entries=0),
+    )
+    return extractor, finder
+
+
+def record(corpus, lat, lng):
+    """Run the corpus against live APIs and overwrite the fixtures"""
+    import google.generativeai as genai
+    import googleapiclient.discovery
+    from http_client import get_session
+    from youtube_videos2 import YouTubeExtractor
+    from medical_finder import NearbyMedicalFinder
+
+    fixtures = {}
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    model = replay.RecordingGeminiModel(genai.GenerativeModel("models/gemini-2.5-flash"), fixtures)
+    youtube = replay.RecordingYouTube(
+        googleapiclient.discovery.build("youtube", "v3", developerKey=os.environ["YOUTUBE_API_KEY"]), fixtures
+    )
+    extractor = YouTubeExtractor(None, None, KeywordCache(max_entries=0), model=model, youtube=youtube)
+    finder = NearbyMedicalFinder(
+        os.environ["GOOGLE_MAPS_API_KEY"], session=replay.RecordingPlacesSession(get_session(), fixtures),
+        embedder=HashingEmbeddingProvider(), place_cache=PlaceResultCache(max_entries=0),
+    )
+    for query in corpus:
+        _, _, medical_keywords = extractor.symptom_to_videos(query)
+        finder.find_nearby_places_new(lat, lng, medical_keywords)
+    replay.save_fixtures(fixtures)
+    print(f"✅ Recorded fixtures for {len(corpus)} queries into {replay.FIXTURES_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {STAGES}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated network latency per API call")
+    parser.add_argument("--embedder", choices=("minilm", "cached", "hash"), default="minilm")
+    parser.add_argument("--corpus", default=os.path.join(replay.FIXTURES_DIR, "symptoms.txt"))
+    parser.add_argument("--lat", type=float, default=DEFAULT_LAT)
+    parser.add_argument("--lng", type=float, default=DEFAULT_LNG)
+    parser.add_argument("--record", action="store_true", help="capture live responses into the fixtures")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline print output")
+    args = parser.parse_args()
+
+    corpus = replay.load_corpus(args.corpus)
+    if args.record:
+        record(corpus, args.lat, args.lng)
+        return
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    fixtures = replay.load_fixtures()
+    if args.embedder == "hash":
+        embedder = HashingEmbeddingProvider()
+    elif args.embedder == "cached":
+        embedder = CachedEmbeddingProvider(LazySentenceTransformerProvider())
+    else:
+        embedder = LazySentenceTransformerProvider()
+    embedder.warm_up(background=False)
+    extractor, finder = build_pipeline(fixtures, args.latency_ms / 1000, embedder)
+    quiet = not args.verbose
+
+    rows = []
+    if "validation" in stages:
+        try:
+            from symptom_gate import SymptomGate, load_ner_pipeline, load_seed_terms
+            # No memo, no precheck: every query pays the full NER pass
+            nlp = load_ner_pipeline()
+            gate = SymptomGate(nlp, use_precheck=False, max_entries=0)
+            rows.append(run_stage("validation", gate.classify, corpus, args.repeat, quiet))
+            # The corpus is held out from the seed list: the precheck may only pass what NER passes
+            disagreements = SymptomGate(nlp, seed_terms=load_seed_terms()).precheck_disagreements(corpus)
+            print(f"🔎 precheck vs NER: {len(disagreements)} disagreement(s) {disagreements}")
+        except (ImportError, OSError) as e:
+            print(f"⏭️ validation skipped (spaCy or its model not installed): {e}")
+
+    if "keywords_local" in stages:
+        from local_keywords import LocalKeywordExtractor
+        # Map-only (no NER): the offline engine's floor, to compare with the videos stage
+        local = LocalKeywordExtractor()
+        rows.append(run_stage("keywords_local", local.extract, corpus, args.repeat, quiet))
+
+    if "videos" in stages:
+        rows.append(run_stage("videos", extractor.symptom_to_videos, corpus, args.repeat, quiet))
+
+    # Keywords for the Places stages come from the same replayed Gemini output
+    with contextlib.redirect_stdout(io.StringIO()):
+        keywords = {q: extractor.extract_keywords(q)[1] for q in corpus}
+
+    if "places" in stages or "scoring" in stages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            places = {q: finder.find_nearby_places_new(args.lat, args.lng, keywords[q]) for q in corpus}
+        if "places" in stages:
+            rows.append(run_stage(
+                "places", lambda q: finder.find_nearby_places_new(args.lat, args.lng, keywords[q]),
+                corpus, args.repeat, quiet))
+        if "scoring" in stages:
+            rows.append(run_stage(
+                "scoring", lambda q: finder.score_places(places[q], q, args.lat, args.lng, keywords[q]),
+                corpus, args.repeat, quiet))
+
+    if "search" in stages:
+        from orchestrator import SearchOrchestrator
+        # End to end: searches start from the streamed Gemini reply, clinics awaited too
+        orchestrator = SearchOrchestrator(extractor, finder)
+        rows.append(run_stage(
+            "search", lambda q: orchestrator.search(q, args.lat, args.lng).clinics(),
+            corpus, args.repeat, quiet))
+
+    print(f"📊 {len(corpus)} queries x {args.repeat} repeats, latency {args.latency_ms}ms/call, "
+          f"embedder={args.embedder}")
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
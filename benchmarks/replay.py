@@ -0,0 +1,228 @@
+"""Recorded-response clients for offline benchmarks.
+
+Replay* classes stand in for the Gemini model, the YouTube Data API client
+and the Places HTTP session, serving responses from benchmarks/fixtures.
+Recording* classes wrap the real clients and capture their responses in the
+same format, so fixtures can be refreshed from a machine with live keys.
+"""
+import json
+import os
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_FILES = ("gemini", "youtube", "places")
+
+_SYMPTOMS_RE = re.compile(r"User symptoms:\s*(.*)")
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def symptoms_from_prompt(prompt: str) -> str:
+    match = _SYMPTOMS_RE.search(prompt)
+    return _normalize(match.group(1)) if match else ""
+
+
+def load_fixtures(directory: str = FIXTURES_DIR) -> Dict[str, dict]:
+    fixtures = {}
+    for name in FIXTURE_FILES:
+        with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as f:
+            fixtures[name] = json.load(f)
+    return fixtures
+
+
+def save_fixtures(fixtures: Dict[str, dict], directory: str = FIXTURES_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for name in FIXTURE_FILES:
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(fixtures.get(name, {}), f, indent=1)
+
+
+def load_corpus(path: str = os.path.join(FIXTURES_DIR, "symptoms.txt")):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _lookup(table: dict, key: str):
+    """Exact key, else the "*" default, so any corpus line gets a response"""
+    return table.get(key, table.get("*"))
+
+
+class _Executable:
+    def __init__(self, response, latency: float):
+        self._response = response
+        self._latency = latency
+
+    def execute(self):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._response
+
+
+# =========================
+# REPLAY
+# =========================
+class ReplayGeminiModel:
+    """With stream=True the recorded text is served in chunk_chars pieces,
+    `latency` spread evenly over them (generation time, not one round trip)
+    """
+
+    def __init__(self, fixtures: dict, latency: float = 0.0, chunk_chars: int = 64):
+        self.responses = fixtures["gemini"]
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        text = _lookup(self.responses, symptoms_from_prompt(prompt))
+        if stream:
+            return self._stream(text)
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(text=text)
+
+    def _stream(self, text: str):
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield SimpleNamespace(text=piece)
+
+
+class _ReplaySearch:
+    def __init__(self, table: dict, latency: float):
+        self.table = table
+        self.latency = latency
+
+    def list(self, q: str = "", **params):
+        return _Executable(_lookup(self.table, q), self.latency)
+
+
+class _ReplayVideos:
+    def __init__(self, table: dict, latency: float):
+        self.table = table
+        self.latency = latency
+
+    def list(self, id: str = "", **params):
+        items = [self.table[v] for v in id.split(",") if v in self.table]
+        return _Executable({"kind": "youtube#videoListResponse", "items": items}, self.latency)
+
+
+class ReplayYouTube:
+    def __init__(self, fixtures: dict, latency: float = 0.0):
+        self._search = _ReplaySearch(fixtures["youtube"]["search"], latency)
+        self._videos = _ReplayVideos(fixtures["youtube"]["videos"], latency)
+
+    def search(self):
+        return self._search
+
+    def videos(self):
+        return self._videos
+
+
+class _ReplayResponse:
+    def __init__(self, payload, status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+
+class ReplayPlacesSession:
+    """Answers POSTs to places:searchText / places:searchNearby"""
+
+    def __init__(self, fixtures: dict, latency: float = 0.0):
+        self.tables = fixtures["places"]
+        self.latency = latency
+
+    def post(self, url: str, headers: dict = None, json: dict = None, timeout: float = None):
+        if self.latency:
+            time.sleep(self.latency)
+        endpoint = url.rsplit(":", 1)[-1]
+        key = _normalize((json or {}).get("textQuery", "*"))
+        payload = _lookup(self.tables.get(endpoint, {}), key)
+        return _ReplayResponse(payload or {}, 200 if payload is not None else 404)
+
+
+# =========================
+# RECORD
+# =========================
+class RecordingGeminiModel:
+    def __init__(self, model, fixtures: dict):
+        self.model = model
+        self.responses = fixtures.setdefault("gemini", {})
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        response = self.model.generate_content(prompt, stream=stream, **kwargs)
+        if stream:
+            return self._record_stream(symptoms_from_prompt(prompt), response)
+        self.responses[symptoms_from_prompt(prompt)] = response.text
+        return response
+
+    def _record_stream(self, symptoms: str, response):
+        pieces = []
+        for chunk in response:
+            try:
+                pieces.append(chunk.text)
+            except ValueError:
+                pass
+            yield chunk
+        self.responses[symptoms] = "".join(pieces)
+
+
+class _RecordingRequest:
+    def __init__(self, request, store: callable):
+        self.request = request
+        self.store = store
+
+    def execute(self):
+        response = self.request.execute()
+        self.store(response)
+        return response
+
+
+class RecordingYouTube:
+    def __init__(self, youtube, fixtures: dict):
+        self.youtube = youtube
+        self.tables = fixtures.setdefault("youtube", {"search": {}, "videos": {}})
+
+    def search(self):
+        resource = self.youtube.search()
+        table = self.tables["search"]
+
+        class _Search:
+            def list(_, q: str = "", **params):
+                return _RecordingRequest(resource.list(q=q, **params),
+                                         lambda r: table.__setitem__(q, r))
+        return _Search()
+
+    def videos(self):
+        resource = self.youtube.videos()
+        table = self.tables["videos"]
+
+        def store(response):
+            for item in response.get("items", []):
+                table[item["id"]] = item
+
+        class _Videos:
+            def list(_, **params):
+                return _RecordingRequest(resource.list(**params), store)
+        return _Videos()
+
+
+class RecordingPlacesSession:
+    def __init__(self, session, fixtures: dict):
+        self.session = session
+        self.tables = fixtures.setdefault("places", {"searchText": {}, "searchNearby": {}})
+
+    def post(self, url: str, **kwargs):
+        response = self.session.post(url, **kwargs)
+        if response.status_code == 200:
+            endpoint = url.rsplit(":", 1)[-1]
+            key = _normalize(kwargs.get("json", {}).get("textQuery", "*"))
+            self.tables.setdefault(endpoint, {})[key] = response.json()
+        return response
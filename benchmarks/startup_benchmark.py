@@ -0,0 +1,58 @@
+"""Cold-start benchmark: lazy vs eager embedding model load.
+
+Each case runs in a fresh interpreter so import caches don't leak between runs.
+
+    python benchmarks/startup_benchmark.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    # What app.py pays today before the first page renders
+    "lazy import": "import medical_finder",
+    # What it paid when the model was loaded at import time (model only: the
+    # cached provider's topic pinning is later warm-up work, not part of the saving)
+    "eager load": (
+        "import medical_finder\n"
+        "medical_finder.get_default_provider().base.warm_up(background=False)"
+    ),
+}
+
+TIMER = """
+import time
+_t0 = time.perf_counter()
+{body}
+print(time.perf_counter() - _t0)
+"""
+
+
+def time_case(body: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", TIMER.format(body=body)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for name, body in CASES.items():
+        timings = [time_case(body) for _ in range(args.runs)]
+        results[name] = statistics.median(timings)
+        print(f"⏱️ {name:12s} median {results[name]:.3f}s over {args.runs} runs")
+
+    saved = results["eager load"] - results["lazy import"]
+    print(f"✅ Cold start saved by lazy loading: {saved:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
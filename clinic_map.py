@@ -0,0 +1,142 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import folium
+
+from medical_finder import CarePlace
+from tracing import span
+
+# "markers": one folium.Marker per clinic (the original map)
+# "geojson": a single GeoJSON layer carrying every clinic as a feature
+RENDERERS = ("markers", "geojson")
+
+LatLng = Tuple[float, float]
+
+
+def map_key(clinics: Sequence[CarePlace], center: LatLng, user_location: Optional[LatLng],
+            renderer: str) -> str:
+    """Stable hash of everything the map HTML depends on"""
+    digest = hashlib.sha1(json.dumps([renderer, center, user_location]).encode("utf-8"))
+    for clinic in clinics:
+        digest.update(json.dumps(clinic.to_row(), default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _popup_html(i: int, clinic: CarePlace) -> str:
+    return f"""
+    <b>#{i} {clinic.name}</b><br>
+    ⭐ {clinic.rating} ({clinic.user_ratings_total} reviews)<br>
+    📏 {clinic.distance_m}m | Match: {clinic.match_percent}%<br>
+    📍 {clinic.address[:60]}...
+    """
+
+
+def _base_map(center: LatLng, user_location: Optional[LatLng]) -> folium.Map:
+    m = folium.Map(location=list(center), zoom_start=13, tiles="OpenStreetMap")
+    # 🔴 RED USER LOCATION (priority)
+    if user_location is not None:
+        folium.Marker(
+            list(user_location),
+            popup="📍 YOU ARE HERE",
+            tooltip="Your Location",
+            icon=folium.Icon(color="red", icon="user", prefix="fa")
+        ).add_to(m)
+    return m
+
+
+def build_marker_map(clinics: Sequence[CarePlace], center: LatLng,
+                     user_location: Optional[LatLng] = None) -> folium.Map:
+    m = _base_map(center, user_location)
+    # 🔵 BLUE CLINIC MARKERS
+    for i, clinic in enumerate(clinics, 1):
+        folium.Marker(
+            [clinic.lat, clinic.lng],
+            popup=_popup_html(i, clinic),
+            tooltip=f"#{i} {clinic.name}",
+            icon=folium.Icon(color="blue", icon="hospital", prefix="fa")
+        ).add_to(m)
+    return m
+
+
+def build_geojson_map(clinics: Sequence[CarePlace], center: LatLng,
+                      user_location: Optional[LatLng] = None) -> folium.Map:
+    """Same information as build_marker_map in one layer (one JS object, not 3 per clinic)"""
+    m = _base_map(center, user_location)
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [clinic.lng, clinic.lat]},
+            "properties": {"label": f"#{i} {clinic.name}", "popup": _popup_html(i, clinic)},
+        }
+        for i, clinic in enumerate(clinics, 1)
+    ]
+    if features:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            name="clinics",
+            tooltip=folium.GeoJsonTooltip(fields=["label"], labels=False),
+            popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+        ).add_to(m)
+    return m
+
+
+class ClinicMapRenderer:
+    """Memoized clinic map HTML, shared by every session.
+
+    Reruns (and other sessions) with the same clinics, centre and user pin
+    reuse the rendered HTML instead of rebuilding folium objects. Records
+    render time as the "map_render" span and the HTML size per render.
+    """
+
+    def __init__(self, renderer: str = "markers", max_entries: int = 256):
+        if renderer not in RENDERERS:
+            raise ValueError(f"renderer must be one of {RENDERERS}")
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self._html: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self.last_payload_bytes = 0
+
+    def render(self, clinics: List[CarePlace], center: LatLng,
+               user_location: Optional[LatLng] = None) -> str:
+        key = map_key(clinics, center, user_location, self.renderer)
+        with span("map_render", renderer=self.renderer) as attrs:
+            with self._lock:
+                html = self._html.get(key)
+                if html is not None:
+                    self._html.move_to_end(key)
+                    self.hits += 1
+            attrs["cached"] = html is not None
+            if html is None:
+                started = time.perf_counter()
+                build = build_geojson_map if self.renderer == "geojson" else build_marker_map
+                html = build(clinics, center, user_location).get_root().render()
+                with self._lock:
+                    self.misses += 1
+                    self.build_seconds += time.perf_counter() - started
+                    self._html[key] = html
+                    while len(self._html) > self.max_entries:
+                        self._html.popitem(last=False)
+            self.last_payload_bytes = len(html.encode("utf-8"))
+            attrs["bytes"] = self.last_payload_bytes
+        return html
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "renderer": self.renderer,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_build_ms": self.build_seconds / self.misses * 1000 if self.misses else 0.0,
+                "last_payload_kb": self.last_payload_bytes / 1024,
+                "size": len(self._html),
+            }
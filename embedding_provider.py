@@ -0,0 +1,424 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch": SentenceTransformer (fp32 PyTorch); "onnx" / "onnx-int8": ONNX Runtime,
+# fp32 or dynamically quantized int8, without importing torch at all
+BACKENDS = ("torch", "onnx", "onnx-int8")
+# ONNX exports shipped in the sentence-transformers model repos
+ONNX_FILES = {"onnx": "onnx/model.onnx", "onnx-int8": "onnx/model_quint8_avx2.onnx"}
+# all-MiniLM-L6-v2's max_seq_length; longer inputs are truncated, as SentenceTransformer does
+MAX_SEQ_LENGTH = 256
+SPECIALTY_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "specialty_map.json")
+
+_default_provider = None
+_default_lock = threading.Lock()
+
+
+class EmbeddingProvider:
+    """Minimal interface the finder needs: text(s) -> embedding(s)"""
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        raise NotImplementedError
+
+    def warm_up(self, background: bool = True):
+        """Load whatever is expensive ahead of the first encode call"""
+
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    @property
+    def name(self) -> str:
+        """Identifies the vector space; vectors stored under another name don't compare"""
+        return type(self).__name__
+
+
+class LazySentenceTransformerProvider(EmbeddingProvider):
+    """SentenceTransformer that is imported and loaded on first use.
+
+    Importing this module does not touch torch; the model loads on the first
+    encode() or via warm_up(), which can run in a daemon thread.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}/torch"
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    print(f"⏳ Loading embedding model {self.model_name}...")
+                    self._model = SentenceTransformer(self.model_name)
+                    print("✅ Embedding model loaded.")
+        return self._model
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        return self.model.encode(texts)
+
+    def warm_up(self, background: bool = True):
+        if self.loaded:
+            return
+        if not background:
+            self.model
+            return
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(
+                target=lambda: self.model, name="embedding-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+
+class LazyOnnxProvider(EmbeddingProvider):
+    """MiniLM on ONNX Runtime (CPU), loaded on first use like the torch provider.
+
+    Runs the model repo's ONNX export (fp32, or the int8 quantized file with
+    variant="onnx-int8") and reproduces SentenceTransformer's mean pooling +
+    L2 normalization in NumPy. Needs onnxruntime, tokenizers and
+    huggingface_hub (for the download) but not torch, so a worker's resident
+    memory is a fraction of the PyTorch backend's. model_path / tokenizer_path
+    point at local files instead of downloading.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, variant: str = "onnx-int8",
+                 model_path: Optional[str] = None, tokenizer_path: Optional[str] = None,
+                 batch_size: int = 32, threads: Optional[int] = None):
+        if variant not in ONNX_FILES:
+            raise ValueError(f"variant must be one of {tuple(ONNX_FILES)}")
+        self.model_name = model_name
+        self.variant = variant
+        self.model_path = model_path
+        self.tokenizer_path = tokenizer_path
+        self.batch_size = batch_size
+        self.threads = threads
+        self._session = None
+        self._tokenizer = None
+        self._input_names = ()
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._session is not None
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}/{self.variant}"
+
+    def _download(self, filename: str) -> str:
+        from huggingface_hub import hf_hub_download
+        repo_id = self.model_name if "/" in self.model_name else f"sentence-transformers/{self.model_name}"
+        return hf_hub_download(repo_id, filename)
+
+    def _load(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import onnxruntime as ort
+                    from tokenizers import Tokenizer
+                    print(f"⏳ Loading embedding model {self.model_name} ({self.variant})...")
+                    tokenizer = Tokenizer.from_file(self.tokenizer_path or self._download("tokenizer.json"))
+                    tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+                    tokenizer.enable_padding()
+                    options = ort.SessionOptions()
+                    if self.threads:
+                        options.intra_op_num_threads = self.threads
+                    session = ort.InferenceSession(
+                        self.model_path or self._download(ONNX_FILES[self.variant]),
+                        options, providers=["CPUExecutionProvider"]
+                    )
+                    self._input_names = tuple(i.name for i in session.get_inputs())
+                    self._tokenizer = tokenizer
+                    self._session = session
+                    print("✅ Embedding model loaded.")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self._session.run(None, {name: feeds[name] for name in self._input_names})[0]
+        # Mean over real tokens, then unit length (SentenceTransformer's Pooling + Normalize)
+        mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        self._load()
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate([
+            self._encode_batch(list(texts[start:start + self.batch_size]))
+            for start in range(0, len(texts), self.batch_size)
+        ])
+
+    def warm_up(self, background: bool = True):
+        if self.loaded:
+            return
+        if not background:
+            self._load()
+            return
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self._load, name="embedding-warmup", daemon=True)
+            self._warmup_thread.start()
+
+
+def make_provider(backend: str = "torch", model_name: str = DEFAULT_MODEL_NAME) -> EmbeddingProvider:
+    """Uncached model provider for one of BACKENDS"""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if backend == "torch":
+        return LazySentenceTransformerProvider(model_name)
+    return LazyOnnxProvider(model_name, variant=backend)
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_vocabulary(path: str = SPECIALTY_MAP_PATH) -> List[str]:
+    """YouTube topics of the specialty map: the local keyword engine sends them
+    verbatim as youtube_keywords, which the video catalog embeds as they are
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        mapping = json.load(f)
+    topics = [topic for entry in mapping["entries"] for topic in entry["youtube_topics"]]
+    return list(dict.fromkeys(topics + mapping["default"]["youtube_topics"]))
+
+
+class NpyEmbeddingStore:
+    """Append-only on-disk vector store: a memory-mapped embeddings.npy of
+    fixed capacity plus an index.json mapping text hash -> row.
+
+    index.json is rewritten by maybe_flush only once flush_rows new rows or
+    flush_seconds have accumulated (and at exit), not on every new vector.
+    """
+
+    def __init__(self, directory: str, capacity: int = 20000, flush_rows: int = 256,
+                 flush_seconds: float = 60.0):
+        os.makedirs(directory, exist_ok=True)
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.vectors_path = os.path.join(directory, "embeddings.npy")
+        self.index_path = os.path.join(directory, "index.json")
+        self._index: Dict[str, int] = {}
+        self._vectors = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        if os.path.exists(self.vectors_path) and os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+            self.capacity = self._vectors.shape[0]
+        atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self._index.get(key)
+        if row is None:
+            return None
+        return np.array(self._vectors[row])
+
+    def put(self, key: str, vector: np.ndarray) -> bool:
+        with self._lock:
+            if key in self._index:
+                return True
+            if self._vectors is None:
+                self._vectors = np.lib.format.open_memmap(
+                    self.vectors_path, mode="w+", dtype=np.float32, shape=(self.capacity, len(vector))
+                )
+            if len(self._index) >= self.capacity:
+                return False
+            row = len(self._index)
+            self._vectors[row] = vector
+            self._index[key] = row
+            self._unflushed += 1
+            return True
+
+    def maybe_flush(self):
+        """flush() once enough rows or time have piled up since the last one"""
+        if self._unflushed >= self.flush_rows or (
+                self._unflushed and time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Write vectors and index.json, only if rows were added since the last flush"""
+        with self._flush_lock:
+            with self._lock:
+                if self._vectors is None or not self._unflushed:
+                    return
+                index = dict(self._index)
+                self._unflushed = 0
+                self._last_flush = time.monotonic()
+            # Rows are written before their index entries, so a crash never indexes garbage
+            self._vectors.flush()
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """Serves repeated strings without running the transformer.
+
+    Lookups go: pinned vocabulary -> in-memory LRU -> optional .npy store,
+    and only the misses of a batch are sent to the wrapped provider. The
+    pinned vocabulary is the fixed YouTube topics of the local keyword engine;
+    place texts and symptoms vary per search and go through the LRU/store.
+    """
+
+    def __init__(self, base: EmbeddingProvider, max_entries: int = 5000,
+                 store_dir: Optional[str] = None, vocabulary: Optional[List[str]] = None):
+        self.base = base
+        self.max_entries = max_entries
+        self.store = NpyEmbeddingStore(store_dir) if store_dir else None
+        self.vocabulary = load_vocabulary() if vocabulary is None else vocabulary
+        self.hits = 0
+        self.misses = 0
+        self._pinned: Dict[str, np.ndarray] = {}
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.base.loaded
+
+    @property
+    def name(self) -> str:
+        return self.base.name
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vector = self._pinned.get(key)
+        if vector is None:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+        if vector is None and self.store is not None:
+            vector = self.store.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+
+        keys = [text_key(t) for t in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vectors[i] = self._lookup(key)
+            # Encode each missing string once, even if it repeats in the batch
+            missing = list(dict.fromkeys(texts[i] for i, v in enumerate(vectors) if v is None))
+            self.hits += len(texts) - sum(v is None for v in vectors)
+            self.misses += len(missing)
+        if missing:
+            encoded = dict(zip(missing, np.asarray(self.base.encode(missing))))
+            with self._lock:
+                for text, vector in encoded.items():
+                    key = text_key(text)
+                    self._remember(key, vector)
+                    if self.store is not None:
+                        self.store.put(key, vector)
+            # Debounced, outside the lock: index.json grows with the store
+            if self.store is not None:
+                self.store.maybe_flush()
+            for i, vector in enumerate(vectors):
+                if vector is None:
+                    vectors[i] = encoded[texts[i]]
+
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    def precompute(self, texts: List[str]):
+        """Pin the vectors of texts that are passed to encode verbatim so LRU
+        eviction never drops them. Texts already pinned are skipped, and vectors
+        found in the .npy store are not re-embedded.
+        """
+        with self._lock:
+            texts = [t for t in dict.fromkeys(texts) if text_key(t) not in self._pinned]
+        if not texts:
+            return
+        vectors = self.encode(texts)
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._pinned[text_key(text)] = vector
+        print(f"✅ Pinned {len(texts)} vocabulary embeddings")
+
+    def warm_up(self, background: bool = True):
+        if not background:
+            self.base.warm_up(background=False)
+            self.precompute(self.vocabulary)
+            return
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(
+                target=self.warm_up, kwargs={"background": False},
+                name="embedding-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "cached": len(self._lru),
+            "pinned": len(self._pinned),
+            "on_disk": len(self.store) if self.store is not None else 0,
+        }
+
+
+def get_default_provider() -> EmbeddingProvider:
+    """Process-wide provider shared by every NearbyMedicalFinder
+    (backend from the EMBEDDING_BACKEND environment variable, default torch)
+    """
+    global _default_provider
+    if _default_provider is None:
+        with _default_lock:
+            if _default_provider is None:
+                _default_provider = CachedEmbeddingProvider(
+                    make_provider(os.environ.get("EMBEDDING_BACKEND", "torch"))
+                )
+    return _default_provider
@@ -0,0 +1,63 @@
+from typing import Sequence, Union
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def haversine(lat1: ArrayLike, lng1: ArrayLike, lat2: ArrayLike, lng2: ArrayLike) -> np.ndarray:
+    """Great-circle distance in metres; arguments broadcast like NumPy arrays"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(np.subtract(lat2, lat1))
+    dlambda = np.radians(np.subtract(lng2, lng1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_matrix(origin_lats: ArrayLike, origin_lngs: ArrayLike,
+                    place_lats: ArrayLike, place_lngs: ArrayLike) -> np.ndarray:
+    """(n_origins, n_places) distances in metres in one broadcasted pass"""
+    origin_lats = np.asarray(origin_lats, dtype=np.float64).reshape(-1, 1)
+    origin_lngs = np.asarray(origin_lngs, dtype=np.float64).reshape(-1, 1)
+    place_lats = np.asarray(place_lats, dtype=np.float64).reshape(1, -1)
+    place_lngs = np.asarray(place_lngs, dtype=np.float64).reshape(1, -1)
+    return haversine(origin_lats, origin_lngs, place_lats, place_lngs)
+
+
+def top_k_indices(keys: Sequence[np.ndarray], k: int) -> np.ndarray:
+    """Indices of the k smallest rows ordered by keys (keys[0] primary, ...).
+
+    Same result as a stable sorted(range(n), key=tuple of keys)[:k], but only
+    the candidates argpartition leaves at or under the k-th primary value are
+    fully sorted. Negate a key to rank it descending.
+    """
+    keys = [np.asarray(key) for key in keys]
+    primary = keys[0]
+    n = len(primary)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth_value = primary[np.argpartition(primary, k - 1)[k - 1]]
+        # keep every tie of the k-th value so secondary keys decide between them
+        candidates = np.flatnonzero(primary <= kth_value)
+    else:
+        candidates = np.arange(n)
+    # lexsort takes the primary key last and is stable
+    order = np.lexsort([key[candidates] for key in reversed(keys)])
+    return candidates[order][:k]
+
+
+def nearest(origin_lats: ArrayLike, origin_lngs: ArrayLike, place_lats: ArrayLike,
+            place_lngs: ArrayLike, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """k nearest places per origin -> (indices, distances), each (n_origins, k)"""
+    distances = distance_matrix(origin_lats, origin_lngs, place_lats, place_lngs)
+    k = min(k, distances.shape[1])
+    if k == 0:
+        empty = np.empty((distances.shape[0], 0))
+        return empty.astype(np.intp), empty
+    part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    part_distances = np.take_along_axis(distances, part, axis=1)
+    order = np.argsort(part_distances, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_distances, order, axis=1)
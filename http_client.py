@@ -0,0 +1,86 @@
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Defaults for the shared session (HTTP_POOL_SIZE env var overrides the pool size)
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Places searches run under a fan-out deadline: one quick retry, none after a
+# read timeout, so a slow answer gets the whole request timeout
+PLACES_URL_PREFIX = "https://places.googleapis.com/"
+PLACES_RETRIES = 1
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout applied to every call"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                   retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF) -> PooledSession:
+    """Keep-alive session with a connection pool and retry/backoff on 429/5xx.
+    After the last retry the final response is returned, not raised.
+    """
+    def adapter(total: int, read: Optional[int] = None) -> HTTPAdapter:
+        retry = Retry(
+            total=total,
+            read=read,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,  # Places searches are POST but read-only
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = PooledSession(timeout)
+    default = adapter(retries)
+    session.mount("https://", default)
+    session.mount("http://", default)
+    session.mount(PLACES_URL_PREFIX, adapter(min(retries, PLACES_RETRIES), read=0))
+    return session
+
+
+def get_session(pool_size: Optional[int] = None) -> PooledSession:
+    """Process-wide shared session (created on first use; pool_size, else the
+    HTTP_POOL_SIZE env var, only applies to that first call)
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                if pool_size is None:
+                    pool_size = int(os.environ.get("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE))
+                _session = create_session(pool_size=int(pool_size))
+    return _session
+
+
+def attempt_timeout(session: requests.Session, budget: float, timeout: float,
+                    url: str = "https://") -> float:
+    """Request timeout for `url` that keeps the first attempt at `timeout`
+    (within `budget`, less the adapter's retry backoff sleeps). Retries only
+    get what remains: callers abandon requests at their deadline.
+    """
+    get_adapter = getattr(session, "get_adapter", None)
+    retry = getattr(get_adapter(url), "max_retries", None) if get_adapter else None
+    retries = (retry.total or 0) if isinstance(retry, Retry) else 0
+    # urllib3 sleeps backoff_factor * 2 ** (n - 1) before the n-th retry, none before the first
+    backoff = sum(retry.backoff_factor * 2 ** (n - 1) for n in range(2, retries + 1)) if retries else 0.0
+    return max(0.1, min(timeout, budget - backoff))
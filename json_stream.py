@@ -0,0 +1,97 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+_FENCED_JSON_RE = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+
+
+def parse_json_reply(text: str) -> Dict[str, Any]:
+    """Whole-reply parse: a ```json fenced object, else the bare text"""
+    match = _FENCED_JSON_RE.search(text)
+    return json.loads(match.group(1) if match else text.strip())
+
+
+class IncrementalJSONParser:
+    """Parses one JSON object from text arriving in chunks (a streamed LLM reply).
+
+    feed() returns the top-level members whose values completed in that chunk,
+    so {"a": [...], "b": [...]} reports "a" as soon as its array closes, before
+    "b" has arrived. Text before the first "{" and after the matching "}"
+    (markdown fences, prose) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.members: Dict[str, Any] = {}
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = 0
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        text = self.text
+        completed = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+            elif not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = i
+            elif self._depth == 1 and ch == ":":
+                self._value_start = i + 1
+            elif self._depth == 1 and ch == ",":
+                self._complete(text[self._value_start:i] if self._value_start is not None else "", completed)
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    # closing brace: a scalar last member ends here
+                    if self._value_start is not None:
+                        self._complete(text[self._value_start:i], completed)
+                    self.done = True
+                elif self._depth == 1 and self._value_start is not None:
+                    self._complete(text[self._value_start:i + 1], completed)
+            i += 1
+        self._pos = i
+        return completed
+
+    def _complete(self, raw: str, completed: list):
+        raw = raw.strip()
+        if raw and self._key is not None:
+            value = json.loads(raw)
+            self.members[self._key] = value
+            completed.append((self._key, value))
+        self._key = None
+        self._value_start = None
+
+    def close(self) -> Dict[str, Any]:
+        """All members; falls back to a whole-text parse if the object never closed"""
+        if self.done:
+            return self.members
+        try:
+            return parse_json_reply(self.text)
+        except ValueError:
+            if self.members:
+                return self.members  # reply cut off after some complete members
+            raise
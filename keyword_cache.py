@@ -0,0 +1,95 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+def normalize_symptoms(text: str) -> str:
+    """Lowercase, collapse whitespace and drop surrounding punctuation"""
+    text = re.sub(r"\s+", " ", (text or "").lower()).strip()
+    return text.strip(".,;:!?\"' ")
+
+
+class KeywordCache:
+    """Process-wide LRU + TTL cache of Gemini keyword extractions.
+
+    Keyed on normalized symptom text and shared by every Streamlit session
+    (the extractor holding it lives in st.cache_resource). If db_path is set,
+    entries are also written to SQLite so they survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 7 * 24 * 3600,
+                 db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[str], List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS keywords ("
+                "key TEXT PRIMARY KEY, youtube TEXT, medical TEXT, created REAL)"
+            )
+            self._db.commit()
+
+    def _expired(self, created: float) -> bool:
+        return time.time() - created > self.ttl_seconds
+
+    def _remember(self, key: str, created: float, youtube: List[str], medical: List[str]):
+        self._entries[key] = (created, youtube, medical)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, symptoms: str) -> Optional[Tuple[List[str], List[str]]]:
+        key = normalize_symptoms(symptoms)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, youtube, medical FROM keywords WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[0]):
+                    entry = (row[0], json.loads(row[1]), json.loads(row[2]))
+                    self._remember(key, *entry)
+                elif row:
+                    self._db.execute("DELETE FROM keywords WHERE key = ?", (key,))
+                    self._db.commit()
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1]), list(entry[2])
+
+    def put(self, symptoms: str, youtube_keywords: List[str], medical_keywords: List[str]):
+        key = normalize_symptoms(symptoms)
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, list(youtube_keywords), list(medical_keywords))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO keywords (key, youtube, medical, created) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(youtube_keywords), json.dumps(medical_keywords), created)
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
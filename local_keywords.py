@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+from itertools import zip_longest
+from typing import Dict, List, Optional, Tuple
+
+from symptom_gate import tokenize
+from tracing import span
+
+SPECIALTY_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "specialty_map.json")
+
+# Engines selectable in YouTubeExtractor (keyword_engine=...)
+ENGINES = ("gemini", "local", "local_first", "fallback")
+
+
+def load_specialty_map(path: str = SPECIALTY_MAP_PATH) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class LocalKeywordExtractor:
+    """Offline stand-in for the Gemini keyword call.
+
+    Condition terms come from two places: DISEASE/CHEMICAL entities found by the
+    scispaCy pipeline (optional) and token n-gram matches against the shipped
+    specialty map. Matched map entries supply the Places keywords; the terms
+    themselves are expanded into YouTube queries. Returns the same
+    (youtube_keywords, medical_keywords) pair as YouTubeExtractor.extract_keywords.
+    """
+
+    def __init__(self, nlp=None, mapping: Optional[Dict] = None,
+                 max_youtube: int = 12, max_medical: int = 8):
+        mapping = mapping or load_specialty_map()
+        self.nlp = nlp
+        self.max_youtube = max_youtube
+        self.max_medical = max_medical
+        self.entries: List[Dict] = mapping["entries"]
+        self.default: Dict = mapping["default"]
+        self.templates: List[str] = mapping["youtube_templates"]
+        self._index: Dict[tuple, List[int]] = {}
+        self._max_term_len = 0
+        for n, entry in enumerate(self.entries):
+            for term in entry["terms"]:
+                tokens = tokenize(term)
+                self._index.setdefault(tokens, []).append(n)
+                self._max_term_len = max(self._max_term_len, len(tokens))
+        self._lock = threading.Lock()
+        self.counts = {"matched": 0, "default": 0}
+
+    def _match_terms(self, tokens: tuple) -> List[Tuple[str, List[int]]]:
+        """Longest-first n-gram matches: [(term, entry indices)]"""
+        matches = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self._max_term_len, len(tokens) - i), 0, -1):
+                gram = tokens[i:i + n]
+                if gram in self._index:
+                    matches.append((" ".join(gram), self._index[gram]))
+                    i += n
+                    break
+            else:
+                i += 1
+        return matches
+
+    def _entities(self, text: str) -> List[str]:
+        if self.nlp is None:
+            return []
+        with span("local_ner"):
+            doc = self.nlp(text)
+        return [ent.text.lower() for ent in doc.ents if ent.label_ in ("DISEASE", "CHEMICAL")]
+
+    def extract(self, user_symptoms: str, use_default: bool = True) -> Optional[Tuple[List[str], List[str]]]:
+        """Returns: youtube_keywords, medical_keywords. Without any recognised
+        condition, the map's generic default (or None if use_default is False).
+        """
+        with span("local_keywords") as attrs:
+            matches = self._match_terms(tokenize(user_symptoms))
+            entity_terms = self._entities(user_symptoms)
+            for entity in entity_terms:
+                # Entities the map has never heard of still become search terms
+                matches.extend(self._match_terms(tokenize(entity)) or [(entity, [])])
+
+            terms = list(dict.fromkeys(term for term, _ in matches))
+            entry_ids = list(dict.fromkeys(n for _, ids in matches for n in ids))
+            attrs["terms"] = len(terms)
+            if not terms:
+                with self._lock:
+                    self.counts["default"] += 1
+                if not use_default:
+                    return None
+                return list(self.default["youtube_topics"]), list(self.default["medical_keywords"])
+
+            youtube_keywords = [template.format(term=term) for term in terms[:2] for template in self.templates]
+            for n in entry_ids:
+                youtube_keywords.extend(self.entries[n]["youtube_topics"])
+            # Round-robin so every matched specialty makes the Places query list
+            medical_keywords = [k for group in zip_longest(*(self.entries[n]["medical_keywords"] for n in entry_ids))
+                                for k in group if k]
+            if len(entry_ids) != 1:
+                # Several (or no) specialties involved: a GP is always a sensible stop
+                medical_keywords.extend(self.default["medical_keywords"])
+            with self._lock:
+                self.counts["matched"] += 1
+
+        return (list(dict.fromkeys(youtube_keywords))[:self.max_youtube],
+                list(dict.fromkeys(medical_keywords))[:self.max_medical])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
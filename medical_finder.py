@@ -1,15 +1,29 @@
 import requests
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
-from dataclasses import dataclass
+import sys
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, astuple, fields
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
-# Load embedding model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from http_client import attempt_timeout, get_session
+from embedding_provider import EmbeddingProvider, get_default_provider
+from place_cache import PlaceResultCache
+from place_catalog import PlaceCatalog
+from tracing import span, bind
+from rate_limiter import RateLimiter, PLACES, CircuitOpenError, get_rate_limiter
+import geo
+from results import MAPS_PLACE_URL
+
+# Places API fan-out limits (seconds)
+PLACES_REQUEST_TIMEOUT = 8
+PLACES_TOTAL_DEADLINE = 10
 
 
 @dataclass
 class CarePlace:
+    # Slotted (one copy per clinic per session adds up); url is derived from place_id
+    __slots__ = ("name", "address", "rating", "user_ratings_total", "distance_m", "match_percent",
+                 "place_id", "lat", "lng", "matched_keywords")
     name: str
     address: str
     rating: float
@@ -17,27 +31,106 @@ class CarePlace:
     distance_m: float
     match_percent: float
     place_id: str
-    url: str
     lat: float
     lng: float
-    matched_keywords: List[str]
+    matched_keywords: Tuple[str, ...]  # interned
+
+    @property
+    def url(self) -> str:
+        return MAPS_PLACE_URL.format(self.place_id)
+
+    def to_dict(self) -> Dict:
+        """JSON-ready dict including the derived url"""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["matched_keywords"] = list(self.matched_keywords)
+        data["url"] = self.url
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CarePlace":
+        values = {f.name: data[f.name] for f in fields(cls)}
+        values["matched_keywords"] = tuple(sys.intern(k) for k in values["matched_keywords"])
+        return cls(**values)
+
+    def to_row(self) -> list:
+        return list(astuple(self))
+
+    @classmethod
+    def from_row(cls, row: list) -> "CarePlace":
+        *values, matched_keywords = row
+        return cls(*values, tuple(sys.intern(k) for k in matched_keywords))
 
 
 class NearbyMedicalFinder:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: requests.Session = None,
+                 embedder: EmbeddingProvider = None, place_cache: PlaceResultCache = None,
+                 rate_limiter: RateLimiter = None, place_catalog: PlaceCatalog = None):
         self.api_key = api_key
+        self.session = session or get_session()
+        # Raw Places results shared by nearby users (same tile/radius/keywords)
+        self.place_cache = place_cache or PlaceResultCache()
+        # Every place the API ever returned, spatially indexed; covered areas skip the API
+        self.place_catalog = place_catalog
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Model is loaded on first embed_text (or by embedder.warm_up())
+        self.embedder = embedder or get_default_provider()
         self.symptom_embedding = None
 
     def embed_text(self, text: str) -> np.ndarray:
-        return model.encode(text)
+        with span("embedding", texts=1):
+            return self.embedder.encode(text)
 
-    def find_nearby_places_new(self, lat: float, lng: float, queries: List[str],
-                            radius: int = 5000) -> List[Dict]:
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts in a single encode call -> (n, dim) array"""
+        with span("embedding", texts=len(texts)):
+            return self.embedder.encode(texts)
+
+    def _post_places(self, url: str, headers: Dict, payload: Dict, label: str,
+                     timeout: float) -> Optional[List[Dict]]:
+        """Single Places API POST -> list of raw places (None on any failure)"""
+        try:
+            self.rate_limiter.acquire(PLACES)
+        except CircuitOpenError as e:
+            print(f"⛔ {label} skipped: {e}")
+            return None
+        try:
+            with span("places_request", request=label) as attrs:
+                response = self.session.post(url, headers=headers, json=payload, timeout=timeout)
+                attrs["status"] = response.status_code
+        except Exception as e:
+            print(f"❌ {label} error: {e}")
+            self.rate_limiter.record_failure(PLACES)
+            return None
+
+        status = response.status_code
+        if status == 200:
+            self.rate_limiter.record_success(PLACES)
+            places = response.json().get("places", [])
+            print(f"✅ {label}: {len(places)} places")
+            return places
+        # Places (New) errors: {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": ...}}
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            error = {}
+        print(f"❌ {label}: HTTP {status} {error.get('status', '')} {error.get('message', response.text[:200])}")
+        quota = status == 429 or error.get("status") == "RESOURCE_EXHAUSTED"
+        if quota or status >= 500:
+            retry_after = response.headers.get("Retry-After")
+            self.rate_limiter.record_failure(
+                PLACES, quota=quota, retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        else:
+            self.rate_limiter.record_success(PLACES)  # our request was rejected, the API is up
+        return None
+
+    def fetch_raw_places(self, lat: float, lng: float, queries: List[str], radius: int = 5000,
+                         request_timeout: float = PLACES_REQUEST_TIMEOUT,
+                         deadline: float = PLACES_TOTAL_DEADLINE) -> tuple[List[Dict], bool]:
         """Places API (New) - Text Search + Nearby Search combo
-        Returns TOP 15 places with ≥2 stars rating only
+        Requests run concurrently; slow ones past `deadline` are dropped.
+        Returns: raw API places in request order, whether every request finished
         """
-        all_places = []
-
         # TEXT SEARCH endpoint for specialty queries
         text_url = "https://places.googleapis.com/v1/places:searchText"
         nearby_url = "https://places.googleapis.com/v1/places:searchNearby"
@@ -48,6 +141,7 @@ class NearbyMedicalFinder:
             "X-Goog-FieldMask": "places.id,places.displayName,places.location,places.types,places.rating,places.userRatingCount,places.formattedAddress"
         }
 
+        jobs = []
         # 1. TEXT SEARCH for specialty (e.g. "cardiologist")
         for query in queries[:3]:  # Limit to top 3
             text_payload = {
@@ -60,14 +154,7 @@ class NearbyMedicalFinder:
                 },
                 "maxResultCount": 10
             }
-            try:
-                response = requests.post(text_url, headers=headers, json=text_payload)
-                if response.status_code == 200:
-                    data = response.json()
-                    all_places.extend(data.get("places", []))
-                    print(f"✅ TextSearch: {len(data.get('places', []))} for '{query}'")
-            except Exception as e:
-                print(f"❌ TextSearch error: {e}")
+            jobs.append((text_url, text_payload, f"TextSearch '{query}'", query))
 
         # 2. NEARBY SEARCH for general medical places
         nearby_payload = {
@@ -80,23 +167,87 @@ class NearbyMedicalFinder:
                 }
             }
         }
+        jobs.append((nearby_url, nearby_payload, "NearbySearch", None))
+
+        # The first attempt keeps the full timeout; session retries get what is left of the deadline
+        request_timeout = attempt_timeout(self.session, deadline, request_timeout, text_url)
+
+        # Fire all requests at once; keep whatever arrived by the deadline
+        results = [None] * len(jobs)
+        executor = ThreadPoolExecutor(max_workers=len(jobs))
+        futures = {
+            executor.submit(bind(self._post_places), url, headers, payload, label, request_timeout): i
+            for i, (url, payload, label, _) in enumerate(jobs)
+        }
         try:
-            response = requests.post(nearby_url, headers=headers, json=nearby_payload)
-            if response.status_code == 200:
-                data = response.json()
-                all_places.extend(data.get("places", []))
-                print(f"✅ NearbySearch: {len(data.get('places', []))} medical places")
-        except Exception as e:
-            print(f"❌ NearbySearch error: {e}")
+            for future in as_completed(futures, timeout=deadline):
+                results[futures[future]] = future.result()
+        except FuturesTimeoutError:
+            pending = [jobs[i][2] for f, i in futures.items() if not f.done()]
+            print(f"⏱️ Places deadline ({deadline}s) hit, returning partial results without: {pending}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.place_catalog is not None:
+            for (_, _, _, query), places in zip(jobs, results):
+                if places is not None:
+                    self.place_catalog.add_response(lat, lng, radius, query, places)
+
+        # Merge in request order so dedupe keeps the same first occurrence
+        all_places = [place for places in results if places for place in places]
+        complete = all(places is not None for places in results)
+        return all_places, complete
+
+    def get_raw_places(self, lat: float, lng: float, queries: List[str], radius: int = 5000,
+                       request_timeout: float = PLACES_REQUEST_TIMEOUT,
+                       deadline: float = PLACES_TOTAL_DEADLINE) -> List[Dict]:
+        """Raw places from the geo-tile cache or the Places API"""
+        all_places = self.place_cache.get(lat, lng, radius, queries[:3])
+        if all_places is not None:
+            print(f"⚡ Place cache hit: {self.place_cache.stats()}")
+            return all_places
+        if self.place_catalog is not None:
+            all_places = self.place_catalog.query(lat, lng, queries[:3], radius)
+            if all_places is not None:
+                print(f"🗺️ Place catalog hit: {len(all_places)} places, no Places API call")
+                self.place_cache.put(lat, lng, radius, queries[:3], all_places)
+                return all_places
+        if not self.rate_limiter.available(PLACES):
+            # Degraded upstream: an expired tile beats no clinics at all
+            stale = self.place_cache.peek(lat, lng, radius, queries[:3], stale_ok=True)
+            if stale is None and self.place_catalog is not None:
+                stale = self.place_catalog.query(lat, lng, queries[:3], radius, require_coverage=False) or None
+            if stale is not None:
+                print("♻️ Places API unavailable, serving stale cached places")
+                return stale
+        all_places, complete = self.fetch_raw_places(lat, lng, queries, radius,
+                                                     request_timeout, deadline)
+        # Partial (deadline-cut) results are not shared with other users
+        if complete:
+            self.place_cache.put(lat, lng, radius, queries[:3], all_places)
+        return all_places
+
+    def find_nearby_places_new(self, lat: float, lng: float, queries: List[str],
+                            radius: int = 5000,
+                            request_timeout: float = PLACES_REQUEST_TIMEOUT,
+                            deadline: float = PLACES_TOTAL_DEADLINE) -> List[Dict]:
+        """Returns TOP 15 places with ≥2 stars rating only, distances from (lat, lng)"""
+        all_places = self.get_raw_places(lat, lng, queries, radius, request_timeout, deadline)
+        return self.select_places(all_places, lat, lng)
 
+    def select_places(self, all_places: List[Dict], lat: float, lng: float) -> List[Dict]:
+        """Raw API places -> deduped, ≥2 star legacy dicts sorted for (lat, lng), TOP 15"""
         # 🔥 NEW: Filter ≥2 stars + Dedupe
         seen_ids = set()
         good_places = []
+        # One vectorized pass; the distances travel with the places into score_places
+        distances = geo.haversine(
+            lat, lng,
+            np.array([p["location"]["latitude"] for p in all_places], dtype=np.float64),
+            np.array([p["location"]["longitude"] for p in all_places], dtype=np.float64),
+        )
         
-        for place in all_places:
-            distance_m = self.haversine(lat, lng,
-            place["location"]["latitude"],
-            place["location"]["longitude"])
+        for place, distance_m in zip(all_places, distances.tolist()):
             place_id = place["id"]
             rating = place.get("rating", 0)
             
@@ -126,76 +277,88 @@ class NearbyMedicalFinder:
                 good_places.append(legacy_place)
                 print(f"✅ Kept {legacy_place['name']}: {rating}⭐")
 
-        good_places.sort(
-            key=lambda p: (
-                p["distance_m"] > 10_000,   # >10 km goes down
-                -p["rating"],               # higher rating first
-                -p["user_ratings_total"],   # more reviews first
-                p["distance_m"]             # nearer first
-            )
-        )
+        if not good_places:
+            return []
+        kept_distances = np.array([p["distance_m"] for p in good_places])
+        top = geo.top_k_indices([
+            kept_distances > 10_000,                                  # >10 km goes down
+            -np.array([p["rating"] for p in good_places]),           # higher rating first
+            -np.array([p["user_ratings_total"] for p in good_places]),  # more reviews first
+            kept_distances,                                           # nearer first
+        ], 15)
 
-        # ✅ Return TOP 15 only (already sorted by relevance)
-        return good_places[:15]
+        # ✅ Return TOP 15 only (sorted by relevance)
+        return [good_places[i] for i in top]
 
     def score_places(self, places: List[Dict], symptom_text: str, lat: float, lng: float, medical_keywords: List[str] = None) -> List[CarePlace]:
-      """Sort by DISTANCE first, then relevance boost"""
+      """Sort by DISTANCE first, then relevance boost
+      All places are embedded in one batch and scored with array ops.
+      """
       self.symptom_embedding = self.embed_text(symptom_text)
-      queries = medical_keywords or self.generate_medical_queries([symptom_text.split()])
+      queries = [sys.intern(q) for q in (medical_keywords or self.generate_medical_queries([symptom_text.split()]))]
+      lowered_queries = [q.lower() for q in queries]
 
-      scored_places = []
-      for place in places:
-          place_loc = place.get("geometry", {}).get("location", {})
-          if not place_loc:
-              continue
-
-          distance = self.haversine(lat, lng, place_loc["lat"], place_loc["lng"])
+      located = [p for p in places if p.get("geometry", {}).get("location", {})]
+      if not located:
+          return []
 
-          # Place text for relevance scoring
-          place_text = f"{place.get('name', '')} {' '.join(place.get('types', []))}"
+      # Place text for relevance scoring + keyword matches (e.g. "cardiology" in name/types)
+      place_texts = [f"{p.get('name', '')} {' '.join(p.get('types', []))}" for p in located]
+      matched = []
+      for place_text in place_texts:
+          lowered_text = place_text.lower()
+          matched.append([q for q, lq in zip(queries, lowered_queries) if lq in lowered_text])
 
-          # Keyword matches (e.g. "cardiology" in name/types)
-          keyword_boost = sum(1 for q in queries if q.lower() in place_text.lower())
+      # Text similarity: one encode call, cosine as matrix-vector product
+      place_embeddings = np.asarray(self.embed_texts(place_texts), dtype=np.float64)
+      symptom_vec = np.asarray(self.symptom_embedding, dtype=np.float64)
+      symptom_vec = symptom_vec / np.linalg.norm(symptom_vec)
+      sims = (place_embeddings / np.linalg.norm(place_embeddings, axis=1, keepdims=True)) @ symptom_vec
 
-          # Text similarity
-          place_embedding = self.embed_text(place_text)
-          sim = np.dot(self.symptom_embedding, place_embedding) / (
-              np.linalg.norm(self.symptom_embedding) * np.linalg.norm(place_embedding)
-          )
+      # select_places already measured from (lat, lng); only compute what's missing
+      if all("distance_m" in p for p in located):
+          distances = np.array([p["distance_m"] for p in located], dtype=np.float64)
+      else:
+          place_lats = np.array([p["geometry"]["location"]["lat"] for p in located], dtype=np.float64)
+          place_lngs = np.array([p["geometry"]["location"]["lng"] for p in located], dtype=np.float64)
+          distances = geo.haversine(lat, lng, place_lats, place_lngs)
 
-          # Rating normalization
-          rating_norm = min(place.get("rating", 0) / 5.0, 1.0)
+      # Rating normalization
+      ratings = np.array([p.get("rating", 0) for p in located], dtype=np.float64)
+      rating_norm = np.minimum(ratings / 5.0, 1.0)
+      keyword_boost = np.array([len(m) for m in matched], dtype=np.float64)
 
-          # RELEVANCE SCORE (0-100%) - ignores distance for sorting
-          relevance_score = 50 * sim + 30 * rating_norm + 20 * keyword_boost
-          match_pct = max(0, min(100, relevance_score))
+      # RELEVANCE SCORE (0-100%) - ignores distance for sorting
+      relevance_scores = 50 * sims + 30 * rating_norm + 20 * keyword_boost
+      match_pcts = np.clip(relevance_scores, 0, 100)
+      rounded_distances = [round(d) for d in distances.tolist()]
+      rounded_pcts = [round(m, 1) for m in match_pcts.tolist()]
 
-          matched_keywords = [q for q in queries if q.lower() in place_text.lower()]
+      # ✅ KEY FIX: Sort by DISTANCE first, then relevance (only the top 15 become CarePlaces)
+      top = geo.top_k_indices([np.array(rounded_distances), np.array(rounded_pcts)], 15)
 
+      scored_places = []
+      for i in top.tolist():
+          place = located[i]
+          place_loc = place["geometry"]["location"]
           care_place = CarePlace(
               name=place.get("name", "Unknown"),
               address=place.get("vicinity", ""),
               rating=place.get("rating", 0),
               user_ratings_total=place.get("user_ratings_total", 0),
-              distance_m=round(distance),
-              match_percent=round(match_pct, 1),
+              distance_m=rounded_distances[i],
+              match_percent=rounded_pcts[i],
               place_id=place["place_id"],
-              url=f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
               lat=place_loc["lat"],
               lng=place_loc["lng"],
-              matched_keywords=matched_keywords[:3]
+              matched_keywords=tuple(matched[i][:3])
           )
           scored_places.append(care_place)
 
-      # ✅ KEY FIX: Sort by DISTANCE first, then relevance
-      return sorted(scored_places, key=lambda p: (p.distance_m, p.match_percent))[:15]
+      return scored_places
 
     def haversine(self, lat1, lon1, lat2, lon2):
-        R = 6371000
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        dphi, dlambda = np.radians(lat2-lat1), np.radians(lon2-lon1)
-        a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
-        return 2 * R * np.arcsin(np.sqrt(a))
+        return geo.haversine(lat1, lon1, lat2, lon2)
 
     def recommend_care(self, symptoms: List[str], medical_keywords: List[str], lat: float = None, 
                     lng: float = None, address: str = None, radius: int = 50000) -> List[CarePlace]:
@@ -212,8 +375,10 @@ class NearbyMedicalFinder:
         print(f"🔍 Symptom text: {symptom_text}")
         print(f"🏥 Using YouTube-generated keywords: {medical_keywords}")
 
-        places = self.find_nearby_places_new(lat, lng, medical_keywords, radius)
-        scored = self.score_places(places, symptom_text, lat, lng, medical_keywords)
+        with span("places_search", radius=radius):
+            places = self.find_nearby_places_new(lat, lng, medical_keywords, radius)
+        with span("score_places", places=len(places)):
+            scored = self.score_places(places, symptom_text, lat, lng, medical_keywords)
         
         print(f"✅ Found {len(scored)} scored recommendations")
         return scored
\ No newline at end of file
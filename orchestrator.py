@@ -0,0 +1,175 @@
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from youtube_videos2 import YouTubeExtractor
+from medical_finder import NearbyMedicalFinder, CarePlace
+from semantic_cache import SemanticCache
+from results import VideoResult
+from tracing import new_trace, bind, span
+
+VIDEOS_NAMESPACE = "videos"
+
+
+def clinics_namespace(lat: float, lng: float) -> tuple:
+    # ~11 m: distances in a reused clinic list stay correct for the caller
+    return ("clinics", round(lat, 4), round(lng, 4))
+
+
+@dataclass
+class SearchResult:
+    videos: List[VideoResult]
+    youtube_keywords: List[str]
+    medical_keywords: List[str]
+    # Resolves to List[CarePlace]; None when no coordinates were given
+    clinics_future: Optional[Future] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Written by the clinics worker only; merged into timings once it resolves
+    clinics_timings: Dict[str, float] = field(default_factory=dict)
+
+    def clinics(self, timeout: float = None) -> Optional[List[CarePlace]]:
+        if self.clinics_future is None:
+            return None
+        clinics = self.clinics_future.result(timeout=timeout)
+        self.timings.update(self.clinics_timings)
+        return clinics
+
+
+class SearchOrchestrator:
+    """Runs the video and clinic pipelines side by side from one Gemini call.
+
+    Gemini's reply is streamed: the YouTube search starts on a worker thread
+    as soon as the youtube_keywords list is complete, and the Places fan-out +
+    embedding scoring as soon as medical_keywords is, both while the rest of
+    the reply is still arriving. Videos are yielded as they become ready;
+    clinics stay on a Future so the CLINICS tab can pick them up (usually
+    already finished).
+
+    With a semantic_cache, a query close enough to an earlier one ("pain in my
+    chest" after "chest pain") reuses its keywords + videos, and its clinics
+    when asked from the same spot, skipping Gemini, YouTube and Places.
+    """
+
+    def __init__(self, yt_extractor: YouTubeExtractor, medical_finder: NearbyMedicalFinder,
+                 max_workers: int = 8, semantic_cache: Optional[SemanticCache] = None):
+        self.yt_extractor = yt_extractor
+        self.medical_finder = medical_finder
+        self.semantic_cache = semantic_cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    def _clinics_stage(self, symptoms: str, medical_keywords: List[str], lat: float, lng: float,
+                       timings: Dict[str, float]) -> List[CarePlace]:
+        started = time.perf_counter()
+        try:
+            clinics = self.medical_finder.recommend_care(symptoms.split(), medical_keywords, lat, lng)
+            if self.semantic_cache is not None and clinics:
+                self.semantic_cache.put(symptoms, clinics, clinics_namespace(lat, lng))
+            return clinics
+        finally:
+            timings["clinics"] = time.perf_counter() - started
+            print(f"⏱️ clinics stage: {timings['clinics']:.2f}s")
+
+    def _videos_stage(self, youtube_keywords: List[str], stages: "queue.Queue",
+                      timings: Dict[str, float]):
+        """stream_search_videos on a worker; stages are handed back through a
+        queue, ending with None
+        """
+        started = time.perf_counter()
+        try:
+            for stage in self.yt_extractor.stream_search_videos(youtube_keywords):
+                stages.put(stage)
+        finally:
+            timings["videos"] = time.perf_counter() - started
+            stages.put(None)
+
+    def _start_clinics(self, symptoms: str, medical_keywords: List[str], lat: float, lng: float,
+                       timings: Dict[str, float]) -> Optional[Future]:
+        if not medical_keywords or lat is None or lng is None:
+            return None
+        clinics = None
+        if self.semantic_cache is not None:
+            clinics = self.semantic_cache.get(symptoms, clinics_namespace(lat, lng))
+        if clinics is not None:
+            clinics_future = Future()
+            clinics_future.set_result(clinics)
+            return clinics_future
+        return self.executor.submit(bind(self._clinics_stage), symptoms, medical_keywords, lat, lng, timings)
+
+    def stream(self, symptoms: str, lat: float = None,
+               lng: float = None) -> Iterator[Tuple[str, Any]]:
+        """Same stages as YouTubeExtractor.stream_videos, with the video and
+        clinics jobs started mid-reply and a final ("done", SearchResult)
+        """
+        # Each worker writes only its own dict, merged here after result()
+        timings: Dict[str, float] = {}
+        video_timings: Dict[str, float] = {}
+        clinics_timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        new_trace()
+
+        cached = None
+        if self.semantic_cache is not None:
+            with span("semantic_cache_lookup"):
+                cached = self.semantic_cache.get(symptoms, VIDEOS_NAMESPACE)
+        if cached is not None:
+            videos, youtube_keywords, medical_keywords = cached
+            timings["keywords"] = time.perf_counter() - started
+            clinics_future = self._start_clinics(symptoms, medical_keywords, lat, lng, clinics_timings)
+            yield "keywords", (youtube_keywords, medical_keywords)
+            timings["to_videos"] = time.perf_counter() - started
+            yield "final", videos
+            yield "done", SearchResult(videos, youtube_keywords, medical_keywords, clinics_future,
+                                       timings, clinics_timings)
+            return
+
+        youtube_keywords, medical_keywords = [], []
+        sources = set()
+        clinics_future = videos_future = None
+        video_stages: "queue.Queue" = queue.Queue()
+        with span("keywords"):
+            for field, values, source in self.yt_extractor.stream_keywords(symptoms):
+                timings[field] = time.perf_counter() - started
+                sources.add(source)
+                if field == "youtube_keywords":
+                    youtube_keywords = values
+                    videos_future = self.executor.submit(
+                        bind(self._videos_stage), youtube_keywords, video_stages, video_timings
+                    )
+                else:
+                    medical_keywords = values
+                    clinics_future = self._start_clinics(symptoms, medical_keywords, lat, lng,
+                                                         clinics_timings)
+        timings["keywords"] = time.perf_counter() - started
+        yield "keywords", (youtube_keywords, medical_keywords)
+
+        videos = []
+        if videos_future is not None:
+            while True:
+                item = video_stages.get()
+                if item is None:
+                    break
+                stage, videos = item
+                if stage == "provisional":
+                    timings["to_first_video"] = time.perf_counter() - started
+                yield stage, videos
+            videos_future.result()  # re-raise a failed search
+            timings.update(video_timings)
+        timings["to_videos"] = time.perf_counter() - started
+        # Local (offline/fallback) keywords are a stopgap: don't serve them for a day
+        if self.semantic_cache is not None and videos and "local" not in sources:
+            self.semantic_cache.put(symptoms, (videos, youtube_keywords, medical_keywords), VIDEOS_NAMESPACE)
+
+        if clinics_future is not None and clinics_future.done():
+            timings.update(clinics_timings)
+        print("⏱️ " + " | ".join(f"{stage}: {secs:.2f}s" for stage, secs in timings.items()))
+        yield "done", SearchResult(videos, youtube_keywords, medical_keywords, clinics_future,
+                                   timings, clinics_timings)
+
+    def search(self, symptoms: str, lat: float = None, lng: float = None) -> SearchResult:
+        result = None
+        for stage, payload in self.stream(symptoms, lat, lng):
+            if stage == "done":
+                result = payload
+        return result
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    """Standard geohash; precision 6 is a ~1.2km x 0.6km tile"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, use_lng = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if use_lng else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        use_lng = not use_lng
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def normalize_keywords(keywords: List[str]) -> Tuple[str, ...]:
+    return tuple(sorted({" ".join(k.lower().split()) for k in keywords if k and k.strip()}))
+
+
+class PlaceResultCache:
+    """Shared LRU + TTL cache of raw Places API results per geo tile.
+
+    Key: (geohash tile of the search centre, radius, normalized keyword set).
+    Values are the raw API places, so each caller still computes distances
+    from its own coordinates.
+    """
+
+    def __init__(self, ttl_seconds: float = 15 * 60, max_entries: int = 2048,
+                 precision: int = 6):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, lat: float, lng: float, radius: int, keywords: List[str]) -> tuple:
+        return geohash_encode(lat, lng, self.precision), int(radius), normalize_keywords(keywords)
+
+    def get(self, lat: float, lng: float, radius: int, keywords: List[str],
+            stale_ok: bool = False) -> Optional[List[Dict]]:
+        """Cached places for the tile; expired entries are kept (until LRU
+        eviction) and only returned with stale_ok, e.g. while the API is down
+        """
+        key = self.key(lat, lng, radius, keywords)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not stale_ok and time.time() - entry[0] > self.ttl_seconds:
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, lat: float, lng: float, radius: int, keywords: List[str],
+             stale_ok: bool = False) -> Optional[List[Dict]]:
+        """Like get, but leaves hit/miss counters and LRU order alone (a second
+        look after a counted miss, e.g. for stale places while the API is down)
+        """
+        key = self.key(lat, lng, radius, keywords)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or (not stale_ok and time.time() - entry[0] > self.ttl_seconds):
+            return None
+        return entry[1]
+
+    def put(self, lat: float, lng: float, radius: int, keywords: List[str], places: List[Dict]):
+        key = self.key(lat, lng, radius, keywords)
+        with self._lock:
+            self._entries[key] = (time.time(), places)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,257 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+import geo
+from place_cache import geohash_encode
+from tracing import span
+
+# Source label for NearbySearch results (text searches use the normalized query)
+NEARBY_SEARCH = "*"
+# Results kept per source, like the API's maxResultCount
+MAX_RESULTS = 10
+# A past search covers users within this distance of its centre
+COVERAGE_RADIUS_M = 2000
+# Searches older than this no longer count as coverage (the area is re-fetched)
+REFRESH_SECONDS = 7 * 24 * 3600
+# Places not seen in any response for this long are left out of answers
+PLACE_TTL_SECONDS = 30 * 24 * 3600
+# Geohash grid cell; precision 4 is ~39 km x 20 km
+GRID_PRECISION = 4
+METERS_PER_DEGREE = 111_320
+
+_GEOHASH_BITS = {4: (10, 10), 5: (13, 12), 6: (15, 15)}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+class PlaceCatalog:
+    """Every place the Places API has returned, indexed on a geohash grid.
+
+    Each place keeps its raw API record, when it was last seen and which
+    searches (normalized text query, or NEARBY_SEARCH) returned it. Searches
+    themselves are logged with centre, radius and time, which is what
+    "coverage" means: a query is answered locally when every search it would
+    send was made, recently enough, from within COVERAGE_RADIUS_M and with a
+    radius at least the query's. Otherwise the API is asked and its results
+    folded in.
+
+    Radius and k-nearest lookups read the grid cells overlapping the circle's
+    bounding box and measure only those places. If db_path is set, places and
+    the search log are kept in SQLite across restarts.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, precision: int = GRID_PRECISION,
+                 coverage_radius_m: float = COVERAGE_RADIUS_M, refresh_seconds: float = REFRESH_SECONDS,
+                 place_ttl_seconds: float = PLACE_TTL_SECONDS):
+        if precision not in _GEOHASH_BITS:
+            raise ValueError(f"precision must be one of {sorted(_GEOHASH_BITS)}")
+        self.precision = precision
+        lng_bits, lat_bits = _GEOHASH_BITS[precision]
+        self.cell_lat = 180.0 / 2 ** lat_bits
+        self.cell_lng = 360.0 / 2 ** lng_bits
+        self.coverage_radius_m = coverage_radius_m
+        self.refresh_seconds = refresh_seconds
+        self.place_ttl_seconds = place_ttl_seconds
+        self._places: Dict[str, dict] = {}
+        self._located: Dict[str, Tuple[float, float]] = {}
+        self._sources: Dict[str, Set[str]] = defaultdict(set)
+        self._seen: Dict[str, float] = {}
+        self._grid: Dict[str, Set[str]] = defaultdict(set)
+        # source -> [(lat, lng, radius, fetched)]
+        self._searches: Dict[str, List[Tuple[float, float, float, float]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.counts = {"local": 0, "api": 0, "stale_served": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS places ("
+                "place_id TEXT PRIMARY KEY, data TEXT, sources TEXT, seen REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS searches (source TEXT, lat REAL, lng REAL, radius REAL, fetched REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS searches_source ON searches (source)")
+            self._db.commit()
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def _load(self):
+        for place_id, data, sources, seen in self._db.execute("SELECT place_id, data, sources, seen FROM places"):
+            self._index(json.loads(data), seen, json.loads(sources))
+        # Expired searches cover nothing: drop them instead of carrying them forever
+        cutoff = time.time() - self.refresh_seconds
+        self._db.execute("DELETE FROM searches WHERE fetched < ?", (cutoff,))
+        self._db.commit()
+        for source, lat, lng, radius, fetched in self._db.execute(
+                "SELECT source, lat, lng, radius, fetched FROM searches"):
+            self._searches[source].append((lat, lng, radius, fetched))
+        if self._places:
+            print(f"🗺️ Place catalog loaded: {len(self._places)} places")
+
+    def _index(self, place: dict, seen: float, sources) -> str:
+        place_id = place["id"]
+        lat, lng = place["location"]["latitude"], place["location"]["longitude"]
+        previous = self._located.get(place_id)
+        if previous is not None and previous != (lat, lng):
+            self._grid[geohash_encode(*previous, self.precision)].discard(place_id)
+        self._places[place_id] = place
+        self._located[place_id] = (lat, lng)
+        self._sources[place_id].update(sources)
+        self._seen[place_id] = seen
+        self._grid[geohash_encode(lat, lng, self.precision)].add(place_id)
+        return place_id
+
+    def add_response(self, lat: float, lng: float, radius: float, query: Optional[str], places: List[Dict]):
+        """Fold one Places API response in (query None = NearbySearch) and log the search"""
+        source = NEARBY_SEARCH if query is None else normalize_query(query)
+        now = time.time()
+        with self._lock:
+            for place in places:
+                if place.get("id") and place.get("location"):
+                    self._index(place, now, (source,))
+            searches = self._searches[source]
+            # Expired searches cover nothing; a repeat search of the same spot replaces the old entry
+            removed = [s for s in searches if now - s[3] > self.refresh_seconds
+                       or (geo.haversine(lat, lng, s[0], s[1]) <= 100 and s[2] <= radius)]
+            if removed:
+                gone = set(removed)
+                searches[:] = [s for s in searches if s not in gone]
+            search = (lat, lng, radius, now)
+            searches.append(search)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO places (place_id, data, sources, seen) VALUES (?, ?, ?, ?)",
+                    [(p["id"], json.dumps(p), json.dumps(sorted(self._sources[p["id"]])), now)
+                     for p in places if p.get("id") and p.get("location")]
+                )
+                self._db.executemany(
+                    "DELETE FROM searches WHERE source = ? AND lat = ? AND lng = ? AND radius = ? AND fetched = ?",
+                    [(source, *s) for s in removed]
+                )
+                self._db.execute(
+                    "INSERT INTO searches (source, lat, lng, radius, fetched) VALUES (?, ?, ?, ?, ?)",
+                    (source, *search)
+                )
+                self._db.commit()
+
+    def _cells(self, lat: float, lng: float, radius: float) -> Set[str]:
+        """Grid cells overlapping the circle's bounding box"""
+        dlat = radius / METERS_PER_DEGREE
+        dlng = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        lats = np.append(np.arange(lat - dlat, lat + dlat, self.cell_lat), lat + dlat)
+        lngs = np.append(np.arange(lng - dlng, lng + dlng, self.cell_lng), lng + dlng)
+        return {
+            geohash_encode(max(-90.0, min(90.0, a)), (b + 180.0) % 360.0 - 180.0, self.precision)
+            for a in lats.tolist() for b in lngs.tolist()
+        }
+
+    def _candidates(self, lat: float, lng: float, radius: float, fresh_only: bool) -> Tuple[List[str], np.ndarray]:
+        cutoff = time.time() - self.place_ttl_seconds
+        ids = [place_id for cell in self._cells(lat, lng, radius) for place_id in self._grid.get(cell, ())
+               if not fresh_only or self._seen[place_id] >= cutoff]
+        if not ids:
+            return [], np.empty(0)
+        located = np.array([self._located[place_id] for place_id in ids], dtype=np.float64)
+        distances = geo.haversine(lat, lng, located[:, 0], located[:, 1])
+        inside = distances <= radius
+        return [place_id for place_id, keep in zip(ids, inside.tolist()) if keep], distances[inside]
+
+    def within(self, lat: float, lng: float, radius: float, fresh_only: bool = True) -> List[Tuple[dict, float]]:
+        """(place, distance_m) for every known place within radius, nearest first"""
+        with self._lock:
+            ids, distances = self._candidates(lat, lng, radius, fresh_only)
+            order = np.argsort(distances, kind="stable")
+            return [(self._places[ids[i]], float(distances[i])) for i in order.tolist()]
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius: float = 50_000,
+                fresh_only: bool = True) -> List[Tuple[dict, float]]:
+        """k nearest known places (within max_radius), widening the search ring as needed"""
+        radius = min(2000.0, max_radius)
+        with self._lock:
+            while True:
+                ids, distances = self._candidates(lat, lng, radius, fresh_only)
+                if len(ids) >= k or radius >= max_radius:
+                    break
+                radius = min(radius * 4, max_radius)
+            top = geo.top_k_indices([distances], k)
+            return [(self._places[ids[i]], float(distances[i])) for i in top.tolist()]
+
+    def _covered(self, source: str, lat: float, lng: float, radius: float, now: float) -> bool:
+        searches = [s for s in self._searches.get(source, ())
+                    if s[2] >= radius and now - s[3] <= self.refresh_seconds]
+        if not searches:
+            return False
+        logged = np.array([s[:3] for s in searches], dtype=np.float64)
+        distances = geo.haversine(lat, lng, logged[:, 0], logged[:, 1])
+        return bool((distances <= self.coverage_radius_m).any())
+
+    def query(self, lat: float, lng: float, queries: List[str], radius: float,
+              require_coverage: bool = True) -> Optional[List[Dict]]:
+        """Raw places shaped like fetch_raw_places output (per text query, then
+        nearby; nearest MAX_RESULTS each), or None when the area is not covered
+        """
+        sources = [normalize_query(q) for q in queries] + [NEARBY_SEARCH]
+        with span("place_catalog_query", radius=radius) as attrs:
+            with self._lock:
+                now = time.time()
+                if require_coverage and not all(self._covered(s, lat, lng, radius, now) for s in sources):
+                    self.counts["api"] += 1
+                    attrs["covered"] = False
+                    return None
+                ids, distances = self._candidates(lat, lng, radius, fresh_only=require_coverage)
+                order = np.argsort(distances, kind="stable").tolist()
+                places = []
+                for source in sources:
+                    matching = [ids[i] for i in order if source in self._sources[ids[i]]]
+                    places.extend(self._places[place_id] for place_id in matching[:MAX_RESULTS])
+                self.counts["local" if require_coverage else "stale_served"] += 1
+                attrs.update(covered=require_coverage, places=len(places))
+                return places
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.time()
+            fresh = sum(1 for seen in self._seen.values() if now - seen <= self.place_ttl_seconds)
+            searches = [s for entries in self._searches.values() for s in entries]
+            recent = sum(1 for s in searches if now - s[3] <= self.refresh_seconds)
+            answered = self.counts["local"] + self.counts["api"]
+            return {
+                **self.counts,
+                "local_rate": self.counts["local"] / answered if answered else 0.0,
+                "places": len(self._places),
+                "fresh_places": fresh,
+                "fresh_ratio": fresh / len(self._places) if self._places else 0.0,
+                "grid_cells": sum(1 for ids in self._grid.values() if ids),
+                "searches": len(searches),
+                "covering_searches": recent,
+            }
+
+    def render_prometheus(self) -> str:
+        s = self.stats()
+        lines = []
+        for name, kind, help_text, value in (
+            ("places", "gauge", "Places known to the local catalog", s["places"]),
+            ("fresh_ratio", "gauge", "Share of catalog places seen within the place TTL", s["fresh_ratio"]),
+            ("covering_searches", "gauge", "Logged searches recent enough to count as coverage",
+             s["covering_searches"]),
+            ("grid_cells", "gauge", "Geohash cells holding at least one place", s["grid_cells"]),
+            ("local_answers_total", "counter", "Clinic lookups answered from the catalog", s["local"]),
+            ("api_fills_total", "counter", "Lookups sent to the Places API (uncovered or stale area)",
+             s["api"]),
+        ):
+            lines += [f"# HELP infohealth_place_catalog_{name} {help_text}",
+                      f"# TYPE infohealth_place_catalog_{name} {kind}",
+                      f"infohealth_place_catalog_{name} {value:g}"]
+        return "\n".join(lines) + "\n"
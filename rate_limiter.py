@@ -0,0 +1,332 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import tracing
+
+# Upstream API names used as limiter keys
+GEMINI = "gemini"
+YOUTUBE = "youtube"
+PLACES = "places"
+
+# Circuit breaker defaults
+FAILURE_THRESHOLD = 5      # consecutive failures that open the circuit
+COOLDOWN_SECONDS = 30      # open -> half-open after this long
+QUOTA_COOLDOWN_SECONDS = 60   # quota errors open the circuit straight away, for longer
+# Google API daily quotas reset at midnight Pacific time (PST; DST ignored)
+QUOTA_DAY_OFFSET = -8 * 3600
+
+_QUOTA_MARKERS = ("quota", "resource_exhausted", "resourceexhausted", "ratelimitexceeded", "rate limit")
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream that is failing or out of budget"""
+
+    def __init__(self, api: str, retry_in: float, reason: str):
+        super().__init__(f"{api} unavailable ({reason}), retry in {retry_in:.0f}s")
+        self.api = api
+        self.retry_in = retry_in
+        self.reason = reason
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by a requests / googleapiclient / google.api_core error"""
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return response.status_code
+    resp = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+    if resp is not None and getattr(resp, "status", None):
+        return int(resp.status)
+    code = getattr(error, "code", None)  # google.api_core exceptions
+    return code if isinstance(code, int) else None
+
+
+def is_quota_error(error: BaseException) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return error.reason in ("quota", "budget")
+    if status_of(error) == 429 or type(error).__name__ == "ResourceExhausted":
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in _QUOTA_MARKERS)
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Errors that say the upstream is degraded (vs. a bad request of ours)"""
+    if is_quota_error(error):
+        return True
+    status = status_of(error)
+    if status is not None:
+        return status >= 500
+    # No HTTP status: network trouble (requests/ssl/socket errors are OSErrors; httplib2's are not)
+    return isinstance(error, OSError) or type(error).__name__ in ("ServerNotFoundError", "HttpLib2Error")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/s refill, up to `capacity` banked"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available (False if timeout passes first)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+class CircuitBreaker:
+    """closed -> (failures) -> open -> (cooldown) -> half-open -> one probe call
+    decides closed again or open for another cooldown
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN_SECONDS,
+                 quota_cooldown: float = QUOTA_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.quota_cooldown = quota_cooldown
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.reason = ""
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_until == 0.0:
+            return "closed"
+        return "open" if now < self.opened_until else "half_open"
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_until - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_until = 0.0
+            self.reason = ""
+            self._probing = False
+
+    def record_failure(self, quota: bool = False, retry_after: Optional[float] = None):
+        with self._lock:
+            self.consecutive_failures += 1
+            was_probe, self._probing = self._probing, False
+            if quota:
+                self._open(retry_after or self.quota_cooldown, "quota")
+            elif was_probe or self.consecutive_failures >= self.failure_threshold:
+                self._open(retry_after or self.cooldown, "failing")
+
+    def _open(self, seconds: float, reason: str):
+        self.opened_until = time.monotonic() + seconds
+        self.reason = reason
+
+
+class RateLimiter:
+    """Per-API guard for upstream calls: token bucket (rate), optional daily
+    unit budget and a circuit breaker. APIs without a bucket are not rate
+    limited; every API gets a breaker.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None,
+                 daily_budgets: Optional[Dict[str, float]] = None,
+                 failure_threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN_SECONDS):
+        self.buckets: Dict[str, TokenBucket] = {
+            api: TokenBucket(rate) for api, rate in (rates or {}).items() if rate
+        }
+        self.daily_budgets = {api: units for api, units in (daily_budgets or {}).items() if units}
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._counts: Dict[str, Dict[str, float]] = {}
+        self._day = self._today()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> int:
+        return int((time.time() + QUOTA_DAY_OFFSET) // 86400)
+
+    def _breaker(self, api: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(api)
+            if breaker is None:
+                breaker = self.breakers[api] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            return breaker
+
+    def _count(self, api: str, field: str, amount: float = 1):
+        with self._lock:
+            today = self._today()
+            if today != self._day:
+                self._day = today
+                for counts in self._counts.values():
+                    counts["units_today"] = 0
+            counts = self._counts.setdefault(
+                api, {"calls": 0, "failures": 0, "rejected": 0, "units_today": 0}
+            )
+            counts[field] += amount
+
+    def _units_today(self, api: str) -> float:
+        with self._lock:
+            if self._today() != self._day:
+                return 0
+            return self._counts.get(api, {}).get("units_today", 0)
+
+    def available(self, api: str) -> bool:
+        """False while the API's circuit is open or its daily budget is spent"""
+        budget = self.daily_budgets.get(api)
+        if budget is not None and self._units_today(api) >= budget:
+            return False
+        return self._breaker(api).state != "open"
+
+    def acquire(self, api: str, tokens: float = 1.0, timeout: Optional[float] = None,
+                cost: float = 1.0) -> bool:
+        """Wait for a rate token; raises CircuitOpenError instead of calling a
+        degraded or out-of-budget upstream. `cost` is in the API's quota units.
+        """
+        budget = self.daily_budgets.get(api)
+        if budget is not None and self._units_today(api) + cost > budget:
+            self._count(api, "rejected")
+            seconds_to_reset = (self._today() + 1) * 86400 - QUOTA_DAY_OFFSET - time.time()
+            raise CircuitOpenError(api, seconds_to_reset, "budget")
+        breaker = self._breaker(api)
+        if not breaker.allow():
+            self._count(api, "rejected")
+            raise CircuitOpenError(api, breaker.retry_in(), breaker.reason or "failing")
+        bucket = self.buckets.get(api)
+        acquired = True if bucket is None else bucket.acquire(tokens, timeout)
+        if acquired:
+            self._count(api, "calls")
+            self._count(api, "units_today", cost)
+        return acquired
+
+    def record_success(self, api: str):
+        self._breaker(api).record_success()
+
+    def record_failure(self, api: str, quota: bool = False, retry_after: Optional[float] = None):
+        self._count(api, "failures")
+        self._breaker(api).record_failure(quota, retry_after)
+        if quota:
+            print(f"⛔ {api}: quota exhausted, pausing calls")
+
+    @contextmanager
+    def guard(self, api: str, cost: float = 1.0):
+        """acquire(), then record the outcome of the wrapped call on the breaker"""
+        self.acquire(api, cost=cost)
+        try:
+            yield
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record_failure(api, quota=is_quota_error(e))
+            else:
+                self.record_success(api)  # our request was bad, the upstream is fine
+            raise
+        self.record_success(api)
+
+    def usage(self) -> Dict[str, dict]:
+        """Per-API budget and breaker state, for dashboards / the debug panel"""
+        apis = sorted(set(self.buckets) | set(self.daily_budgets) | set(self.breakers) | set(self._counts))
+        report = {}
+        for api in apis:
+            breaker = self._breaker(api)
+            with self._lock:
+                counts = dict(self._counts.get(api, {"calls": 0, "failures": 0, "rejected": 0, "units_today": 0}))
+            if self._today() != self._day:
+                counts["units_today"] = 0
+            bucket = self.buckets.get(api)
+            budget = self.daily_budgets.get(api)
+            report[api] = {
+                **counts,
+                "state": breaker.state,
+                "retry_in_s": round(breaker.retry_in(), 1),
+                "tokens_available": round(bucket.available(), 2) if bucket else None,
+                "daily_budget": budget,
+                "budget_used": counts["units_today"] / budget if budget else None,
+            }
+        return report
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP infohealth_upstream_calls_total Upstream API calls let through",
+            "# TYPE infohealth_upstream_calls_total counter",
+        ]
+        usage = self.usage()
+        for api, u in usage.items():
+            lines.append(f'infohealth_upstream_calls_total{{api="{api}"}} {u["calls"]}')
+        lines += ["# HELP infohealth_upstream_failures_total Failed upstream calls",
+                  "# TYPE infohealth_upstream_failures_total counter"]
+        for api, u in usage.items():
+            lines.append(f'infohealth_upstream_failures_total{{api="{api}"}} {u["failures"]}')
+        lines += ["# HELP infohealth_upstream_rejected_total Calls refused by breaker or budget",
+                  "# TYPE infohealth_upstream_rejected_total counter"]
+        for api, u in usage.items():
+            lines.append(f'infohealth_upstream_rejected_total{{api="{api}"}} {u["rejected"]}')
+        lines += ["# HELP infohealth_upstream_circuit_open 1 while the API's circuit is open",
+                  "# TYPE infohealth_upstream_circuit_open gauge"]
+        for api, u in usage.items():
+            lines.append(f'infohealth_upstream_circuit_open{{api="{api}"}} {int(u["state"] == "open")}')
+        lines += ["# HELP infohealth_upstream_budget_used Fraction of the daily unit budget spent",
+                  "# TYPE infohealth_upstream_budget_used gauge"]
+        for api, u in usage.items():
+            if u["budget_used"] is not None:
+                lines.append(f'infohealth_upstream_budget_used{{api="{api}"}} {u["budget_used"]:.4f}')
+        return "\n".join(lines) + "\n"
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter (no rate limits, breakers on) shared by every client"""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+                tracing.registry.add_collector(_default_limiter.render_prometheus)
+    return _default_limiter
@@ -0,0 +1,119 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import msgpack  # optional: smaller + faster than JSON for cached/transferred results
+except ImportError:
+    msgpack = None
+
+YOUTUBE_WATCH_URL = "https://www.youtube.com/watch?v={}"
+# Same image the API returns as snippet.thumbnails.medium
+YOUTUBE_THUMBNAIL_URL = "https://i.ytimg.com/vi/{}/mqdefault.jpg"
+MAPS_PLACE_URL = "https://www.google.com/maps/place/?q=place_id:{}"
+
+PACKED_CONTENT_TYPE = "application/x-msgpack" if msgpack is not None else "application/json"
+
+
+def intern_all(strings: Iterable[str]) -> List[str]:
+    """One shared str object per distinct keyword across sessions/results"""
+    return [sys.intern(s) for s in strings]
+
+
+class VideoResult:
+    """One video card. Slotted; url and thumbnail are derived from the ID.
+
+    Supports video["title"]-style reads so templates written for the old
+    dicts keep working. views/likes/score are None while provisional.
+    """
+
+    __slots__ = ("video_id", "title", "views", "likes", "score")
+    FIELDS = __slots__
+
+    def __init__(self, video_id: str, title: str, views: Optional[int] = None,
+                 likes: Optional[int] = None, score: Optional[int] = None):
+        self.video_id = video_id
+        self.title = title
+        self.views = views
+        self.likes = likes
+        self.score = score
+
+    @property
+    def url(self) -> str:
+        return YOUTUBE_WATCH_URL.format(self.video_id)
+
+    @property
+    def thumbnail(self) -> str:
+        return YOUTUBE_THUMBNAIL_URL.format(self.video_id)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS or key in ("url", "thumbnail"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VideoResult):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"VideoResult({self.video_id!r}, {self.title!r}, views={self.views}, score={self.score})"
+
+    def to_row(self) -> list:
+        return [self.video_id, self.title, self.views, self.likes, self.score]
+
+    @classmethod
+    def from_row(cls, row: list) -> "VideoResult":
+        return cls(*row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy dict shape (url/thumbnail included) for JSON consumers"""
+        return {
+            "title": self.title,
+            "url": self.url,
+            "video_id": self.video_id,
+            "thumbnail": self.thumbnail,
+            "views": self.views,
+            "likes": self.likes,
+            "score": self.score,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VideoResult":
+        return cls(data["video_id"], data["title"], data.get("views"), data.get("likes"), data.get("score"))
+
+
+def _as_row(obj: Any) -> Any:
+    if hasattr(obj, "to_row"):
+        return obj.to_row()
+    raise TypeError(f"cannot pack {type(obj).__name__}")
+
+
+def as_json(obj: Any) -> Any:
+    """json.dumps default= hook: result objects in their legacy dict shape"""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return str(obj)
+
+
+def pack(obj: Any) -> bytes:
+    """msgpack when installed, else compact UTF-8 JSON; result objects become rows"""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True, default=_as_row)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_as_row).encode("utf-8")
+
+
+def unpack(data: bytes, content_type: Optional[str] = None) -> Any:
+    if content_type is None:
+        content_type = PACKED_CONTENT_TYPE
+    if "msgpack" in content_type:
+        if msgpack is None:
+            raise RuntimeError("msgpack payload received but msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
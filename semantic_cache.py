@@ -0,0 +1,127 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from embedding_provider import EmbeddingProvider
+from keyword_cache import normalize_symptoms
+from tracing import span
+
+
+class SemanticCache:
+    """Reuses results of earlier queries that mean the same thing.
+
+    Normalized query text is embedded with the shared embedder and compared
+    (cosine) against every live entry of the same namespace; the best match at
+    or above `threshold` is a hit. Identical normalized text short-circuits
+    before any embedding. Entries live in a fixed (max_entries x dim) matrix,
+    so lookup is one matrix-vector product; the least recently used row is
+    overwritten when full, and rows older than ttl_seconds never match.
+
+    Namespaces keep unrelated results apart, e.g. "videos" vs
+    ("clinics", lat, lng) so clinics are only reused for the same spot. Each
+    is also keyed by the embedder's name, so vectors from another backend
+    (torch vs ONNX) are never compared with the current one's.
+    """
+
+    def __init__(self, embedder: EmbeddingProvider, threshold: float = 0.9,
+                 max_entries: int = 512, ttl_seconds: float = 24 * 3600):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._matrix: Optional[np.ndarray] = None
+        self._namespaces: List[Optional[Hashable]] = [None] * max_entries
+        self._texts: List[Optional[str]] = [None] * max_entries
+        self._values: List[Any] = [None] * max_entries
+        self._created = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._exact: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self.counts = {"exact": 0, "semantic": 0, "misses": 0, "skipped": 0, "evictions": 0}
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        # Never block a query on the model load; until MiniLM is up we just miss
+        if not self.embedder.loaded:
+            return None
+        with span("semantic_cache_embed"):
+            vector = np.asarray(self.embedder.encode(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _namespace(self, namespace: Hashable) -> tuple:
+        return self.embedder.name, namespace
+
+    def _live(self, row: int, namespace: Hashable, now: float) -> bool:
+        return self._namespaces[row] == namespace and now - self._created[row] <= self.ttl_seconds
+
+    def get(self, text: str, namespace: Hashable = None) -> Optional[Any]:
+        if self.max_entries <= 0:
+            return None
+        key = normalize_symptoms(text)
+        namespace = self._namespace(namespace)
+        now = time.time()
+        with self._lock:
+            row = self._exact.get((namespace, key))
+            if row is not None and self._live(row, namespace, now):
+                self._last_used[row] = now
+                self.counts["exact"] += 1
+                return self._values[row]
+
+        vector = self._embed(key)
+        with self._lock:
+            if vector is None:
+                self.counts["skipped"] += 1
+                return None
+            if self._matrix is not None and self._matrix.shape[1] == len(vector):
+                similarities = self._matrix @ vector
+                live = (now - self._created <= self.ttl_seconds) & np.fromiter(
+                    (ns == namespace for ns in self._namespaces), dtype=bool, count=self.max_entries
+                )
+                similarities[~live] = -1.0
+                row = int(np.argmax(similarities))
+                if similarities[row] >= self.threshold:
+                    self._last_used[row] = now
+                    self.counts["semantic"] += 1
+                    print(f"🧠 Semantic cache hit: '{key}' ~ '{self._texts[row]}' ({similarities[row]:.2f})")
+                    return self._values[row]
+            self.counts["misses"] += 1
+        return None
+
+    def put(self, text: str, value: Any, namespace: Hashable = None):
+        if self.max_entries <= 0:
+            return
+        key = normalize_symptoms(text)
+        namespace = self._namespace(namespace)
+        vector = self._embed(key)
+        if vector is None:
+            return
+        now = time.time()
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                # First entry, or the embedder changed dimension: old rows can't be compared
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            row = self._exact.get((namespace, key))
+            if row is None:
+                row = int(np.argmin(self._last_used))  # empty rows have last_used 0
+                if self._texts[row] is not None:
+                    self._exact.pop((self._namespaces[row], self._texts[row]), None)
+                    self.counts["evictions"] += 1
+            self._matrix[row] = vector
+            self._namespaces[row] = namespace
+            self._texts[row] = key
+            self._values[row] = value
+            self._created[row] = now
+            self._last_used[row] = now
+            self._exact[(namespace, key)] = row
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.counts["exact"] + self.counts["semantic"]
+            lookups = hits + self.counts["misses"] + self.counts["skipped"]
+            return {
+                **self.counts,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "size": sum(t is not None for t in self._texts),
+            }
@@ -0,0 +1,258 @@
+"""Recommender as an asyncio HTTP service (plain ASGI, no framework).
+
+    GEMINI_API_KEY=... YOUTUBE_API_KEY=... GOOGLE_MAPS_API_KEY=... \\
+    uvicorn service:app --host 0.0.0.0 --port 8000
+
+Endpoints (GET query string or POST JSON body; JSON responses, or msgpack rows
+for clients sending "Accept: application/x-msgpack"):
+    /videos   symptoms                                  -> videos + both keyword lists
+    /clinics  symptoms, lat, lng [, radius, medical_keywords] -> clinics
+    /health, /metrics (Prometheus text from tracing)
+
+Errors are JSON {"error", "kind"}: an open circuit is 503 (429 when it opened
+on quota) with kind "circuit_open", api, reason and retry_in_s; an upstream
+quota error is 429 "quota", an unavailable upstream 503 "unavailable", any
+other upstream failure 502 "upstream". service_client maps them back.
+
+Identical work already in flight is shared rather than repeated: concurrent
+requests for the same normalized symptoms share one Gemini call and one
+YouTube search, and clinic requests in the same geo tile with the same
+keywords share one Places fan-out (distances/scoring stay per caller).
+Set VIDEO_CATALOG_DB / PLACE_CATALOG_DB to persist the local video and place
+catalogs across restarts.
+"""
+import asyncio
+import inspect
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+import tracing
+from keyword_cache import normalize_symptoms
+from youtube_videos2 import YouTubeExtractor
+from medical_finder import NearbyMedicalFinder
+from video_catalog import VideoCatalog
+from place_catalog import PlaceCatalog
+from rate_limiter import CircuitOpenError, is_quota_error, status_of
+from results import PACKED_CONTENT_TYPE, as_json, msgpack, pack
+
+DEFAULT_RADIUS = 50000
+
+
+class Coalescer:
+    """Single-flight: concurrent calls with the same key await one execution"""
+
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key, fn: Callable, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, tracing.bind(fn), *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        # shield: one client disconnecting must not cancel the shared call
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RecommenderService:
+    def __init__(self, extractor: YouTubeExtractor, finder: NearbyMedicalFinder, max_workers: int = 32):
+        self.extractor = extractor
+        self.finder = finder
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommender")
+        self.coalescer = Coalescer(self.executor)
+
+    @classmethod
+    def from_env(cls) -> "RecommenderService":
+        place_catalog = PlaceCatalog(db_path=os.environ.get("PLACE_CATALOG_DB"))
+        tracing.registry.add_collector(place_catalog.render_prometheus)
+        finder = NearbyMedicalFinder(os.environ["GOOGLE_MAPS_API_KEY"], place_catalog=place_catalog)
+        finder.embedder.warm_up(background=True)
+        extractor = YouTubeExtractor(
+            os.environ["GEMINI_API_KEY"], os.environ["YOUTUBE_API_KEY"],
+            keyword_engine=os.environ.get("KEYWORD_ENGINE", "fallback"),
+            video_catalog=VideoCatalog(finder.embedder, db_path=os.environ.get("VIDEO_CATALOG_DB")),
+        )
+        return cls(extractor, finder)
+
+    async def keywords(self, symptoms: str):
+        key = ("keywords", normalize_symptoms(symptoms))
+        return await self.coalescer.run(key, self.extractor.extract_keywords, symptoms)
+
+    async def videos(self, params: Dict) -> Dict:
+        symptoms = _require(params, "symptoms")
+        youtube_keywords, medical_keywords = await self.keywords(symptoms)
+        key = ("videos", tuple(youtube_keywords))
+        videos = await self.coalescer.run(key, self.extractor.search_videos, youtube_keywords)
+        return {"videos": videos, "youtube_keywords": youtube_keywords, "medical_keywords": medical_keywords}
+
+    async def clinics(self, params: Dict) -> Dict:
+        symptoms = _require(params, "symptoms")
+        lat, lng = _number(params, "lat", float), _number(params, "lng", float)
+        radius = _number(params, "radius", int, DEFAULT_RADIUS)
+        medical_keywords = params.get("medical_keywords")
+        if isinstance(medical_keywords, str):
+            medical_keywords = [k for k in medical_keywords.split(",") if k.strip()]
+        if not medical_keywords:
+            _, medical_keywords = await self.keywords(symptoms)
+
+        key = ("places",) + self.finder.place_cache.key(lat, lng, radius, medical_keywords[:3])
+        raw_places = await self.coalescer.run(
+            key, self.finder.get_raw_places, lat, lng, medical_keywords, radius
+        )
+
+        def score():
+            places = self.finder.select_places(raw_places, lat, lng)
+            return self.finder.score_places(places, " ".join(symptoms.split()), lat, lng, medical_keywords)
+
+        loop = asyncio.get_running_loop()
+        scored = await loop.run_in_executor(self.executor, tracing.bind(score))
+        return {"clinics": scored, "medical_keywords": medical_keywords}
+
+    def health(self, params: Dict) -> Dict:
+        upstreams = self.extractor.rate_limiter.usage()
+        degraded = sorted(api for api, u in upstreams.items() if u["state"] == "open")
+        return {
+            "status": "degraded" if degraded else "ok",
+            "degraded": degraded,
+            "upstreams": upstreams,
+            "coalescing": self.coalescer.stats(),
+        }
+
+
+def _require(params: Dict, name: str):
+    value = params.get(name)
+    if value in (None, ""):
+        raise HTTPError(400, f"missing parameter: {name}")
+    return value
+
+
+def _number(params: Dict, name: str, cast: Callable, default=None):
+    """Parameter converted with cast; a bad value is the client's error (400)"""
+    value = params.get(name) or default
+    if value is None:
+        value = _require(params, name)
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"parameter {name} must be a number, got {value!r}")
+
+
+async def _read_params(scope, receive) -> Dict:
+    params = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    if scope["method"] == "POST":
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if body:
+            try:
+                params.update(json.loads(body))
+            except json.JSONDecodeError:
+                raise HTTPError(400, "body must be JSON")
+    return params
+
+
+async def _send(send, status: int, body: bytes, content_type: str = "application/json"):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_app(service: Optional[RecommenderService] = None):
+    """ASGI callable; without a service one is built from env keys at startup"""
+    state = {"service": service}
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    try:
+                        if state["service"] is None:
+                            state["service"] = RecommenderService.from_env()
+                    except Exception as e:
+                        await send({"type": "lifespan.startup.failed", "message": f"{type(e).__name__}: {e}"})
+                        return
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["type"] != "http":
+            return
+        if state["service"] is None:
+            state["service"] = RecommenderService.from_env()
+        svc = state["service"]
+        path = scope["path"].rstrip("/") or "/"
+
+        if path == "/metrics":
+            await _send(send, 200, tracing.registry.render_prometheus().encode(), "text/plain; version=0.0.4")
+            return
+        routes: Dict[str, Callable[[Dict], Any]] = {
+            "/videos": svc.videos,
+            "/clinics": svc.clinics,
+            "/health": svc.health,
+        }
+        handler = routes.get(path)
+        try:
+            if handler is None:
+                raise HTTPError(404, f"unknown path: {path}")
+            if scope["method"] not in ("GET", "POST"):
+                raise HTTPError(405, "use GET or POST")
+            params = await _read_params(scope, receive)
+            tracing.new_trace()
+            with tracing.span("http_" + path.strip("/")):
+                result = handler(params)
+                if inspect.isawaitable(result):
+                    result = await result
+            status, payload = 200, result
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e), "kind": "request"}
+        except CircuitOpenError as e:
+            status = 429 if is_quota_error(e) else 503
+            payload = {"error": str(e), "kind": "circuit_open", "api": e.api, "reason": e.reason,
+                       "retry_in_s": round(e.retry_in)}
+        except Exception as e:
+            print(f"❌ {path} failed: {e}")
+            if is_quota_error(e):
+                status, kind = 429, "quota"
+            elif status_of(e) == 503:
+                status, kind = 503, "unavailable"
+            else:
+                status, kind = 502, "upstream"
+            payload = {"error": f"{type(e).__name__}: {e}", "kind": kind}
+        # Clients sending "Accept: application/x-msgpack" get rows instead of dicts
+        accept = dict(scope.get("headers") or []).get(b"accept", b"").decode()
+        if msgpack is not None and status == 200 and PACKED_CONTENT_TYPE in accept:
+            await _send(send, status, pack(payload), PACKED_CONTENT_TYPE)
+        else:
+            await _send(send, status, json.dumps(payload, ensure_ascii=False, default=as_json).encode("utf-8"))
+
+    return app
+
+
+app = create_app()
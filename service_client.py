@@ -0,0 +1,90 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import requests
+
+from http_client import get_session
+from medical_finder import CarePlace
+from orchestrator import SearchResult
+from rate_limiter import CircuitOpenError
+from results import PACKED_CONTENT_TYPE, VideoResult, msgpack, unpack
+
+
+def _raise_service_error(response: requests.Response):
+    """Re-raise a service error as the exception the in-process pipeline would
+    have raised: CircuitOpenError for an open circuit, otherwise an HTTPError
+    carrying the status (429 still reads as a quota error to is_quota_error)
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    if body.get("kind") == "circuit_open":
+        raise CircuitOpenError(body.get("api", "recommender"), body.get("retry_in_s", 0),
+                               body.get("reason", "open"))
+    message = body.get("error") or response.reason
+    raise requests.HTTPError(f"{response.status_code} {body.get('kind', 'error')}: {message}",
+                             response=response)
+
+
+class RecommenderClient:
+    """Thin HTTP client of service.py with the SearchOrchestrator interface
+    (stream / search) plus recommend_care, so app.py can use either.
+    """
+
+    def __init__(self, base_url: str, session: requests.Session = None, timeout: float = 30,
+                 max_workers: int = 8):
+        self.base_url = base_url.rstrip("/")
+        self.session = session or get_session()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clinics")
+
+    def _post(self, path: str, payload: Dict) -> Tuple[Dict, bool]:
+        """Returns: response body, whether it is packed (rows) rather than JSON dicts"""
+        headers = {"Accept": PACKED_CONTENT_TYPE} if msgpack is not None else None
+        response = self.session.post(f"{self.base_url}{path}", json=payload, headers=headers,
+                                     timeout=self.timeout)
+        if not response.ok:
+            _raise_service_error(response)
+        content_type = response.headers.get("Content-Type", "application/json")
+        return unpack(response.content, content_type), "msgpack" in content_type
+
+    def symptom_to_videos(self, user_symptoms: str) -> tuple[List[VideoResult], List[str], List[str]]:
+        data, packed = self._post("/videos", {"symptoms": user_symptoms})
+        decode = VideoResult.from_row if packed else VideoResult.from_dict
+        return [decode(v) for v in data["videos"]], data["youtube_keywords"], data["medical_keywords"]
+
+    def recommend_care(self, symptoms: List[str], medical_keywords: List[str], lat: float = None,
+                       lng: float = None, radius: int = 50000) -> List[CarePlace]:
+        data, packed = self._post("/clinics", {
+            "symptoms": " ".join(symptoms), "medical_keywords": medical_keywords,
+            "lat": lat, "lng": lng, "radius": radius,
+        })
+        decode = CarePlace.from_row if packed else CarePlace.from_dict
+        return [decode(clinic) for clinic in data["clinics"]]
+
+    def stream(self, symptoms: str, lat: float = None, lng: float = None) -> Iterator[Tuple[str, Any]]:
+        """Same events as SearchOrchestrator.stream minus "provisional"
+        (the service returns ranked videos in one response)
+        """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        videos, youtube_keywords, medical_keywords = self.symptom_to_videos(symptoms)
+        timings["to_videos"] = time.perf_counter() - started
+        yield "keywords", (youtube_keywords, medical_keywords)
+
+        clinics_future = None
+        if medical_keywords and lat is not None and lng is not None:
+            clinics_future = self.executor.submit(
+                self.recommend_care, symptoms.split(), medical_keywords, lat, lng
+            )
+        yield "final", videos
+        yield "done", SearchResult(videos, youtube_keywords, medical_keywords, clinics_future, timings)
+
+    def search(self, symptoms: str, lat: float = None, lng: float = None) -> SearchResult:
+        result = None
+        for stage, payload in self.stream(symptoms, lat, lng):
+            if stage == "done":
+                result = payload
+        return result
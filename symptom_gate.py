@@ -0,0 +1,132 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+
+from tracing import span
+
+# Components en_ner_bc5cdr_md ships with that NER does not need
+UNUSED_PIPES = ("tagger", "attribute_ruler", "lemmatizer", "parser")
+SEED_TERMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "disease_terms.txt")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+# A seed term is trusted only if NER tags it as a whole DISEASE entity in each of these
+VERIFY_TEMPLATES = ("{}", "I have {}.", "Suffering from {} since yesterday.")
+
+
+def load_ner_pipeline(model_name: str = "en_ner_bc5cdr_md"):
+    """spaCy pipeline with only what DISEASE detection needs"""
+    import spacy
+    return spacy.load(model_name, exclude=list(UNUSED_PIPES))
+
+
+def tokenize(text: str) -> tuple:
+    return tuple(_TOKEN_RE.findall((text or "").lower()))
+
+
+def load_seed_terms(path: str = SEED_TERMS_PATH) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip().lower() for line in f if line.strip() and not line.startswith("#")}
+
+
+def disease_entities(nlp, text: str) -> List[str]:
+    return [ent.text for ent in nlp(text).ents if ent.label_ == "DISEASE"]
+
+
+def verify_terms(nlp, terms: Iterable[str]) -> Set[str]:
+    """The terms the model itself labels as one whole DISEASE entity in every
+    VERIFY_TEMPLATES context; the rest would be the precheck's guess, not NER's"""
+    verified = set()
+    for term in terms:
+        if all(term in (e.lower() for e in disease_entities(nlp, t.format(term))) for t in VERIFY_TEMPLATES):
+            verified.add(term)
+    return verified
+
+
+class SymptomGate:
+    """Decides whether text mentions a DISEASE entity, running NER as rarely as possible.
+
+    1. memo: verdict per normalized text (Streamlit reruns with unchanged input)
+    2. precheck: seed terms matched as token n-grams; a hit skips NER. Only
+       seeds NER itself labels DISEASE are kept (verify_terms), and the seed
+       file leaves out words with everyday meanings ("cold", "swelling")
+    3. NER on the slimmed pipeline for everything else. Its entities are not
+       fed back into (2): one hit says nothing about the word in other text
+    """
+
+    def __init__(self, nlp, seed_terms: Optional[Iterable[str]] = None,
+                 use_precheck: bool = True, max_entries: int = 4096, verify_seeds: bool = True):
+        self.nlp = nlp
+        self.use_precheck = use_precheck
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[tuple, bool]" = OrderedDict()
+        self._terms: Set[tuple] = set()
+        self._max_term_len = 0
+        self._lock = threading.Lock()
+        self.counts = {"memo": 0, "precheck": 0, "ner": 0}
+        seed_terms = {t.strip().lower() for t in seed_terms or ()}
+        if use_precheck and verify_seeds and seed_terms:
+            seed_terms = verify_terms(nlp, seed_terms)
+        for term in seed_terms:
+            self._add_term(term)
+
+    def _add_term(self, term: str):
+        tokens = tokenize(term)
+        if tokens:
+            self._terms.add(tokens)
+            self._max_term_len = max(self._max_term_len, len(tokens))
+
+    def _precheck(self, tokens: tuple) -> bool:
+        for n in range(1, min(self._max_term_len, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                if tokens[i:i + n] in self._terms:
+                    return True
+        return False
+
+    def _finish(self, key: tuple, verdict: bool, source: str) -> tuple[bool, str]:
+        with self._lock:
+            self.counts[source] += 1
+            if source != "memo":
+                self._memo[key] = verdict
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+        return verdict, source
+
+    def classify(self, text: str) -> tuple[bool, str]:
+        """Returns: (mentions a disease, which stage answered: memo/precheck/ner)"""
+        with span("symptom_validation") as attrs:
+            verdict, source = self._classify(text)
+            attrs["source"] = source
+        return verdict, source
+
+    def _classify(self, text: str) -> tuple[bool, str]:
+        key = tokenize(text)
+        with self._lock:
+            verdict = self._memo.get(key)
+            if verdict is not None:
+                self._memo.move_to_end(key)
+        if verdict is not None:
+            return self._finish(key, verdict, "memo")
+
+        if self.use_precheck and self._precheck(key):
+            return self._finish(key, True, "precheck")
+
+        with span("spacy_ner"):
+            diseases = disease_entities(self.nlp, text)
+        return self._finish(key, bool(diseases), "ner")
+
+    def precheck_disagreements(self, texts: Iterable[str]) -> List[str]:
+        """Texts the precheck would pass that NER does not tag, for checking
+        the seed list against a held-out set. Empty means they agree."""
+        return [t for t in texts
+                if self._precheck(tokenize(t)) and not disease_entities(self.nlp, t)]
+
+    def has_disease(self, text: str) -> bool:
+        return self.classify(text)[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counts, "memo_size": len(self._memo), "known_terms": len(self._terms)}
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules live at the repository root (no package); benchmarks/ holds the replay fixtures
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
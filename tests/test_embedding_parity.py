@@ -0,0 +1,31 @@
+"""ONNX backends against the PyTorch reference (skipped without onnxruntime / torch)"""
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+pytest.importorskip("huggingface_hub")
+pytest.importorskip("sentence_transformers")
+
+from embedding_benchmark import PARITY_MIN_COSINE, benchmark_texts, parity
+from embedding_provider import make_provider
+from replay import FIXTURES_DIR
+
+
+@pytest.fixture(scope="module")
+def texts():
+    queries, candidates = benchmark_texts(f"{FIXTURES_DIR}/symptoms.txt")
+    return queries, queries + candidates
+
+
+@pytest.fixture(scope="module")
+def reference(texts):
+    return np.asarray(make_provider("torch").encode(texts[1]), dtype=np.float32)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_matches_torch(backend, texts, reference):
+    embeddings = make_provider(backend).encode(texts[1])
+    min_cos, _, overlap = parity(embeddings, reference, len(texts[0]))
+    assert min_cos >= PARITY_MIN_COSINE[backend]
+    assert overlap >= 0.8
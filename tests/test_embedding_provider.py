@@ -0,0 +1,50 @@
+import os
+
+import embedding_provider
+from clock import FakeClock
+from embedding_provider import CachedEmbeddingProvider, load_vocabulary
+from local_keywords import LocalKeywordExtractor
+from pipeline_benchmark import HashingEmbeddingProvider
+
+
+def test_pinned_topics_are_what_the_local_engine_sends():
+    provider = CachedEmbeddingProvider(HashingEmbeddingProvider())
+    provider.warm_up(background=False)
+    provider.warm_up(background=False)  # second warm-up pins nothing new
+    assert provider.stats()["pinned"] == len(load_vocabulary()) == provider.stats()["misses"]
+    youtube_keywords, _ = LocalKeywordExtractor().extract("chest pain and palpitations")
+    before = provider.stats()["hits"]
+    provider.encode(youtube_keywords)
+    pinned_topics = [k for k in youtube_keywords if k in load_vocabulary()]
+    assert pinned_topics and provider.stats()["hits"] - before == len(pinned_topics)
+
+
+def test_cached_embedding_provider_lru_and_store(tmp_path):
+    provider = CachedEmbeddingProvider(HashingEmbeddingProvider(), max_entries=2,
+                                       store_dir=str(tmp_path), vocabulary=["heart health"])
+    provider.warm_up(background=False)
+    provider.encode(["fever", "cough", "fever", "rash"])
+    assert provider.stats()["misses"] == 4 and provider.stats()["cached"] == 2
+    assert provider.stats()["pinned"] == 1
+    provider.store.flush()
+    reopened = CachedEmbeddingProvider(HashingEmbeddingProvider(), store_dir=str(tmp_path), vocabulary=[])
+    reopened.encode(["fever", "heart health"])
+    assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 0
+
+
+def test_store_index_is_flushed_on_a_row_or_time_threshold(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(embedding_provider, "time", clock)
+    provider = CachedEmbeddingProvider(HashingEmbeddingProvider(), store_dir=str(tmp_path), vocabulary=[])
+    provider.store.flush_rows, provider.store.flush_seconds = 3, 60
+    index_path = provider.store.index_path
+    provider.encode(["fever", "cough"])
+    assert not os.path.exists(index_path)
+    provider.encode(["rash"])
+    assert len(CachedEmbeddingProvider(HashingEmbeddingProvider(), store_dir=str(tmp_path)).store) == 3
+    provider.encode(["itch"])
+    clock.advance(61)
+    provider.encode(["itch", "fever"])  # all hits: nothing new to write, but the timer has run out
+    assert len(CachedEmbeddingProvider(HashingEmbeddingProvider(), store_dir=str(tmp_path)).store) == 3
+    provider.encode(["ache"])
+    assert len(CachedEmbeddingProvider(HashingEmbeddingProvider(), store_dir=str(tmp_path)).store) == 5
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import geo
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 7, 20, 25])
+def test_top_k_indices_matches_stable_sort_with_ties(k):
+    rng = np.random.default_rng(k)
+    distance = rng.integers(0, 5, size=20).astype(float)   # many ties
+    rating = -rng.integers(0, 3, size=20).astype(float)     # descending secondary key
+    expected = sorted(range(20), key=lambda i: (distance[i], rating[i]))[:k]
+    assert geo.top_k_indices([distance, rating], k).tolist() == expected
+
+
+def test_top_k_indices_empty_input():
+    assert geo.top_k_indices([np.array([])], 3).tolist() == []
+
+
+def test_haversine_is_vectorized_and_symmetric():
+    lats, lngs = np.array([23.5224, 23.5324]), np.array([87.3233, 87.3233])
+    distances = geo.haversine(23.5224, 87.3233, lats, lngs)
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(1112, rel=0.01)  # 0.01 degrees of latitude
+    assert geo.haversine(23.5324, 87.3233, 23.5224, 87.3233) == pytest.approx(distances[1])
@@ -0,0 +1,21 @@
+from http_client import PLACES_URL_PREFIX, attempt_timeout, create_session
+
+PLACES_URL = PLACES_URL_PREFIX + "v1/places:searchText"
+
+
+def test_first_attempt_keeps_the_request_timeout():
+    session = create_session()
+    assert attempt_timeout(session, budget=10, timeout=8, url=PLACES_URL) == 8
+    assert attempt_timeout(session, budget=5, timeout=8, url=PLACES_URL) == 5
+
+
+def test_places_gets_one_retry_and_none_after_read_timeouts():
+    retry = create_session(retries=2).get_adapter(PLACES_URL).max_retries
+    assert retry.total == 1 and retry.read == 0
+    assert create_session(retries=2).get_adapter("https://example.com").max_retries.total == 2
+
+
+def test_backoff_sleeps_come_out_of_the_budget():
+    session = create_session(retries=3, backoff=1.0)
+    # sleeps of 2 s and 4 s before the 2nd and 3rd retries
+    assert attempt_timeout(session, budget=10, timeout=8) == 4
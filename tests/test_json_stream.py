@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser, parse_json_reply
+
+REPLY = {"youtube_keywords": ["chest pain relief", "angina signs"],
+         "medical_keywords": ["cardiologist", "heart hospital"]}
+
+
+def feed_all(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend((i, member) for member in parser.feed(text[i:i + size]))
+    return parser, events
+
+
+def test_one_character_chunks_report_each_member_when_it_closes():
+    text = json.dumps(REPLY)
+    parser, events = feed_all(text, 1)
+    assert [member for _, member in events] == list(REPLY.items())
+    # youtube_keywords is reported before medical_keywords has arrived
+    assert events[0][0] < text.index("medical_keywords")
+    assert parser.done and parser.close() == REPLY
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 10000])
+def test_fences_and_surrounding_prose_are_ignored(size):
+    text = "Here are the keywords:\n```json\n" + json.dumps(REPLY, indent=2) + "\n```\nHope this helps {!}"
+    parser, events = feed_all(text, size)
+    assert dict(member for _, member in events) == REPLY
+    assert parser.close() == REPLY
+    assert parse_json_reply(text) == REPLY
+
+
+def test_brackets_braces_and_escaped_quotes_inside_strings():
+    reply = {"youtube_keywords": ["pain ] relief", "{not an object", 'say "ah"'],
+             "medical_keywords": ["clinic, 24h", '"quoted" [doctor]\\']}
+    text = json.dumps(reply)
+    parser, events = feed_all(text, 2)
+    assert dict(member for _, member in events) == reply
+    assert parser.close() == reply
+
+
+def test_escaped_quote_in_key():
+    parser, events = feed_all('{"a\\"b": [1], "c": [2]}', 1)
+    assert [member for _, member in events] == [('a"b', [1]), ("c", [2])]
+
+
+def test_scalar_and_nested_members():
+    reply = {"keywords": ["x"], "meta": {"lang": "en", "tags": [1, 2]}, "count": 3, "ok": True}
+    parser, events = feed_all(json.dumps(reply), 1)
+    assert [member for _, member in events] == list(reply.items())
+    assert parser.close() == reply
+
+
+def test_truncated_object_keeps_complete_members():
+    text = '{"youtube_keywords": ["a", "b"], "medical_keywords": ["cardio'
+    parser, events = feed_all(text, 5)
+    assert [member for _, member in events] == [("youtube_keywords", ["a", "b"])]
+    assert not parser.done
+    assert parser.close() == {"youtube_keywords": ["a", "b"]}
+
+
+def test_close_falls_back_to_whole_text_parse():
+    parser = IncrementalJSONParser()
+    parser.feed('["not", "an", "object"]')
+    assert parser.feed("") == [] and not parser.done
+    assert parser.close() == ["not", "an", "object"]
+
+
+def test_close_raises_without_any_complete_member():
+    parser = IncrementalJSONParser()
+    parser.feed('Sorry, {"youtube_keywords": ["a"')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_nothing_is_parsed_after_the_object_closes():
+    parser, events = feed_all('{"a": [1]} {"b": [2]}', 1)
+    assert [member for _, member in events] == [("a", [1])]
+    assert parser.close() == {"a": [1]}
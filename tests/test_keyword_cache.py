@@ -0,0 +1,34 @@
+import pytest
+
+import keyword_cache
+from clock import FakeClock
+from keyword_cache import KeywordCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(keyword_cache, "time", clock)
+    return clock
+
+
+def test_keyword_cache_evicts_least_recently_used():
+    cache = KeywordCache(max_entries=2)
+    cache.put("fever", ["a"], ["b"])
+    cache.put("cough", ["c"], ["d"])
+    assert cache.get("  Fever ") == (["a"], ["b"])  # normalized, and now most recent
+    cache.put("rash", ["e"], ["f"])
+    assert cache.get("cough") is None
+    assert cache.get("fever") is not None and cache.get("rash") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_keyword_cache_expires_in_memory_and_on_disk(clock, tmp_path):
+    db = str(tmp_path / "keywords.sqlite")
+    KeywordCache(ttl_seconds=60, db_path=db).put("fever", ["a"], ["b"])
+    cache = KeywordCache(ttl_seconds=60, db_path=db)
+    assert cache.get("fever") == (["a"], ["b"])  # read back from SQLite
+    clock.advance(61)
+    assert cache.get("fever") is None
+    assert KeywordCache(ttl_seconds=3600, db_path=db).get("fever") is None  # expired row was deleted
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
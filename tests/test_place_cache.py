@@ -0,0 +1,43 @@
+import pytest
+
+import place_cache
+from clock import FakeClock
+from place_cache import PlaceResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(place_cache, "time", clock)
+    return clock
+
+
+def test_place_cache_normalizes_keywords_and_expires(clock):
+    cache = PlaceResultCache(ttl_seconds=60)
+    places = [{"id": "p1"}]
+    cache.put(23.52, 87.32, 5000, ["Cardiologist", "ECG"], places)
+    assert cache.get(23.52, 87.32, 5000, [" ecg", "cardiologist"]) == places
+    assert cache.get(23.52, 87.32, 10000, ["cardiologist", "ecg"]) is None
+    clock.advance(61)
+    assert cache.get(23.52, 87.32, 5000, ["cardiologist", "ecg"]) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_place_cache_evicts_least_recently_used():
+    cache = PlaceResultCache(max_entries=2)
+    for i, lat in enumerate((10.0, 20.0, 30.0)):
+        cache.put(lat, 0.0, 5000, ["x"], [{"id": i}])
+    assert cache.get(10.0, 0.0, 5000, ["x"]) is None
+    assert cache.get(30.0, 0.0, 5000, ["x"]) == [{"id": 2}]
+
+
+def test_place_cache_serves_stale_rows_only_on_request(clock):
+    cache = PlaceResultCache(ttl_seconds=60)
+    places = [{"id": "p1"}]
+    cache.put(23.52, 87.32, 5000, ["Cardiologist"], places)
+    clock.advance(61)
+    assert cache.get(23.52, 87.32, 5000, ["cardiologist"]) is None
+    assert cache.peek(23.52, 87.32, 5000, ["cardiologist"]) is None
+    assert cache.peek(23.52, 87.32, 5000, ["cardiologist"], stale_ok=True) == places
+    assert cache.get(23.52, 87.32, 5000, ["cardiologist"], stale_ok=True) == places
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)  # peek is not counted
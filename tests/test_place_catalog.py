@@ -0,0 +1,78 @@
+import sqlite3
+import time
+
+from place_catalog import NEARBY_SEARCH, PlaceCatalog
+
+LAT, LNG = 23.5224, 87.3233
+QUERIES = ["cardiologist"]
+
+
+def place(i, dlat=0.0):
+    return {"id": f"p{i}", "displayName": {"text": f"Clinic {i}"},
+            "location": {"latitude": LAT + dlat + i * 1e-4, "longitude": LNG}}
+
+
+def fill(catalog, lat=LAT, lng=LNG, radius=5000):
+    catalog.add_response(lat, lng, radius, "Cardiologist", [place(i) for i in range(3)])
+    catalog.add_response(lat, lng, radius, None, [place(i) for i in range(3, 6)])
+
+
+def test_query_needs_a_nearby_search_at_least_as_wide():
+    catalog = PlaceCatalog()
+    fill(catalog)
+    assert len(catalog.query(LAT, LNG, QUERIES, 5000)) == 6
+    # ~1.1 km away is within COVERAGE_RADIUS_M, ~2.2 km is not; a wider radius is never covered
+    assert catalog.query(LAT + 0.01, LNG, QUERIES, 5000) is not None
+    assert catalog.query(LAT + 0.02, LNG, QUERIES, 3000) is None
+    assert catalog.query(LAT, LNG, QUERIES, 10000) is None
+    # text query never sent from here
+    assert catalog.query(LAT, LNG, ["dentist"], 5000) is None
+    assert catalog.stats()["local"] == 2 and catalog.stats()["api"] == 3
+
+
+def test_wide_search_covers_a_user_500m_away():
+    catalog = PlaceCatalog()
+    fill(catalog, radius=50000)
+    assert len(catalog.query(LAT + 0.0045, LNG, QUERIES, 50000)) == 6
+
+
+def test_stale_query_ignores_coverage():
+    catalog = PlaceCatalog()
+    fill(catalog)
+    assert len(catalog.query(LAT + 0.01, LNG, ["dentist"], 5000, require_coverage=False)) == 3
+
+
+def test_repeat_searches_replace_their_log_row(tmp_path):
+    db = str(tmp_path / "places.sqlite")
+    catalog = PlaceCatalog(db_path=db)
+    for _ in range(3):
+        fill(catalog)
+    fill(catalog, lat=LAT + 0.5)
+    rows = sqlite3.connect(db).execute("SELECT source, COUNT(*) FROM searches GROUP BY source").fetchall()
+    assert dict(rows) == {"cardiologist": 2, NEARBY_SEARCH: 2}
+
+    reloaded = PlaceCatalog(db_path=db)
+    assert len(reloaded) == 6
+    assert len(reloaded.query(LAT, LNG, QUERIES, 5000)) == 6
+
+
+def test_load_prunes_expired_searches(tmp_path):
+    db = str(tmp_path / "places.sqlite")
+    fill(PlaceCatalog(db_path=db))
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE searches SET fetched = ?", (time.time() - 30 * 24 * 3600,))
+    reloaded = PlaceCatalog(db_path=db)
+    assert reloaded.stats()["searches"] == 0
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM searches").fetchone() == (0,)
+    assert reloaded.query(LAT, LNG, QUERIES, 5000) is None
+
+
+def test_within_and_nearest_are_sorted_by_distance():
+    catalog = PlaceCatalog()
+    catalog.add_response(LAT, LNG, 50000, None, [place(i, dlat=0.05 * (i % 3)) for i in range(9)])
+    within = catalog.within(LAT, LNG, 3000)
+    assert [p["id"] for p, _ in within] == ["p0", "p3", "p6"]
+    nearest = catalog.nearest(LAT, LNG, 4)
+    assert [p["id"] for p, _ in nearest][:3] == ["p0", "p3", "p6"]
+    distances = [d for _, d in nearest]
+    assert distances == sorted(distances) and len(nearest) == 4
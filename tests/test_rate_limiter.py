@@ -0,0 +1,63 @@
+import pytest
+
+import rate_limiter
+from clock import FakeClock
+from rate_limiter import CircuitBreaker, CircuitOpenError, RateLimiter, is_quota_error
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.retry_in() == pytest.approx(30)
+
+    clock.advance(30)
+    assert breaker.state == "half_open"
+    assert breaker.allow()        # the single probe
+    assert not breaker.allow()    # everyone else waits for it
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10)
+    breaker.record_failure()
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.reason == "failing"
+    assert breaker.retry_in() == pytest.approx(10)
+
+
+def test_quota_failure_opens_at_once(clock):
+    breaker = CircuitBreaker(failure_threshold=5, quota_cooldown=60)
+    breaker.record_failure(quota=True)
+    assert breaker.state == "open" and breaker.reason == "quota"
+    breaker.record_failure(quota=True, retry_after=120)
+    assert breaker.retry_in() == pytest.approx(120)
+
+
+def test_guard_raises_circuit_open_error_while_open(clock):
+    limiter = RateLimiter(failure_threshold=1, cooldown=30)
+    with pytest.raises(ConnectionError):
+        with limiter.guard("places"):
+            raise ConnectionError("reset by peer")
+    assert not limiter.available("places")
+    with pytest.raises(CircuitOpenError) as info:
+        with limiter.guard("places"):
+            pass
+    assert info.value.api == "places" and not is_quota_error(info.value)
+    clock.advance(30)
+    with limiter.guard("places"):
+        pass
+    assert limiter.available("places")
@@ -0,0 +1,55 @@
+import pytest
+
+import semantic_cache
+from clock import FakeClock
+from pipeline_benchmark import HashingEmbeddingProvider
+from semantic_cache import SemanticCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    return clock
+
+
+class OtherBackend(HashingEmbeddingProvider):
+    @property
+    def name(self):
+        return "other-backend"
+
+
+def test_semantic_cache_matches_similar_text_within_namespace(clock):
+    cache = SemanticCache(HashingEmbeddingProvider(), threshold=0.8)
+    cache.put("sharp chest pain", "videos-1", "videos")
+    assert cache.get("Sharp  chest pain", "videos") == "videos-1"
+    assert cache.get("sharp chest pain today", "videos") == "videos-1"
+    assert cache.get("sharp chest pain", ("clinics", 1.0, 2.0)) is None
+    assert cache.get("itchy skin rash", "videos") is None
+    clock.advance(24 * 3600 + 1)
+    assert cache.get("sharp chest pain", "videos") is None
+    counts = cache.stats()
+    assert (counts["exact"], counts["semantic"], counts["misses"]) == (1, 1, 3)
+
+
+def test_semantic_cache_keeps_backends_apart():
+    cache = SemanticCache(HashingEmbeddingProvider(), threshold=0.8)
+    cache.put("sharp chest pain", "torch-videos", "videos")
+    cache.embedder = OtherBackend()
+    assert cache.get("sharp chest pain", "videos") is None
+    cache.put("sharp chest pain", "other-videos", "videos")
+    assert cache.get("sharp chest pain", "videos") == "other-videos"
+
+
+def test_semantic_cache_overwrites_least_recently_used_row(clock):
+    cache = SemanticCache(HashingEmbeddingProvider(), threshold=0.99, max_entries=2)
+    cache.put("fever", 1)
+    clock.advance(1)
+    cache.put("cough", 2)
+    clock.advance(1)
+    assert cache.get("fever") == 1
+    clock.advance(1)
+    cache.put("rash", 3)
+    assert cache.get("cough") is None
+    assert cache.get("fever") == 1 and cache.get("rash") == 3
+    assert cache.stats()["evictions"] == 1
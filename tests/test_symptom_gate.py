@@ -0,0 +1,64 @@
+import os
+
+from replay import FIXTURES_DIR
+from symptom_gate import SymptomGate, load_seed_terms
+
+
+class Entity:
+    def __init__(self, text):
+        self.text, self.label_ = text, "DISEASE"
+
+
+class Doc:
+    def __init__(self, ents):
+        self.ents = ents
+
+
+class StubNER:
+    """Tags its terms as DISEASE wherever they occur, except "cold", which it
+    only tags after "a"/"have" (as the real model does for context-bound words)"""
+
+    def __init__(self, terms):
+        self.terms = set(terms)
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        lowered = text.lower()
+        ents = [Entity(t) for t in self.terms if t in lowered]
+        if "a cold" in lowered or "have cold" in lowered:
+            ents.append(Entity("cold"))
+        return Doc(ents)
+
+
+def load_corpus():
+    with open(os.path.join(FIXTURES_DIR, "symptoms.txt"), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def test_seed_terms_are_kept_only_if_ner_tags_them():
+    nlp = StubNER(load_seed_terms() - {"dengue"})
+    gate = SymptomGate(nlp, seed_terms=load_seed_terms() | {"cold"})
+    assert gate.classify("my room is cold") == (False, "ner")
+    assert gate.classify("i have dengue") == (False, "ner")  # the model disagrees, so NER decides
+    assert gate.classify("severe headache") == (True, "precheck")
+
+
+def test_ner_hits_do_not_become_precheck_triggers():
+    nlp = StubNER(set())
+    gate = SymptomGate(nlp, seed_terms=[])
+    assert gate.classify("I think I have a cold") == (True, "ner")
+    assert gate.classify("the cold room") == (False, "ner")
+    assert gate.stats()["known_terms"] == 0
+
+
+def test_precheck_agrees_with_ner_on_held_out_text():
+    nlp = StubNER(load_seed_terms())
+    gate = SymptomGate(nlp, seed_terms=load_seed_terms())
+    held_out = load_corpus() + ["my room is cold", "took a stroke of luck", "the swelling river"]
+    assert gate.precheck_disagreements(held_out) == []
+    for text in held_out:
+        verdict, source = gate.classify(text)
+        if source == "precheck":
+            assert verdict and nlp(text).ents
+    assert gate.stats()["precheck"] > 0
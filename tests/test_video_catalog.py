@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from pipeline_benchmark import HashingEmbeddingProvider
+from results import VideoResult
+from video_catalog import VideoCatalog, generic_tokens
+
+TOOTHACHE = ["toothache home remedies", "toothache when to see a doctor"]
+BACK_PAIN = ["back pain home remedies", "back pain when to see a doctor"]
+
+
+class NotLoadedProvider(HashingEmbeddingProvider):
+    """MiniLM still loading: the catalog can only match titles lexically"""
+
+    @property
+    def loaded(self):
+        return False
+
+
+def back_pain_videos(n=12):
+    return [VideoResult(f"bp{i}", f"Back pain home remedies that work #{i}", 1000 * i, 10 * i)
+            for i in range(n)]
+
+
+@pytest.fixture(params=["lexical", "embedded"])
+def catalog(request):
+    embedder = NotLoadedProvider() if request.param == "lexical" else HashingEmbeddingProvider()
+    catalog = VideoCatalog(embedder, refresh_seconds=0)
+    catalog.add(back_pain_videos())
+    return catalog
+
+
+def test_template_words_alone_do_not_make_a_title_relevant(catalog):
+    assert catalog.search(TOOTHACHE) is None
+    assert catalog.stats()["youtube"] == 1
+
+
+def test_matching_condition_is_served_locally(catalog):
+    videos = catalog.search(BACK_PAIN)
+    assert videos is not None and len(videos) == 10
+    assert [v.video_id for v in videos[:2]] == ["bp11", "bp10"]  # engagement order
+    assert catalog.stats()["local"] == 1
+
+
+def test_generic_tokens_cover_templates_but_not_placeholder():
+    tokens = generic_tokens(["{term} causes", "{term} home remedies", "{term} when to see a doctor"])
+    assert {"causes", "home", "remedies", "doctor", "when"} <= tokens
+    assert "term" not in tokens
+
+
+class OtherBackend(HashingEmbeddingProvider):
+    @property
+    def name(self):
+        return "other-backend"
+
+
+def test_title_embeddings_are_kept_per_backend(tmp_path):
+    db = str(tmp_path / "videos.sqlite")
+    VideoCatalog(HashingEmbeddingProvider(), db_path=db, refresh_seconds=0).add(back_pain_videos())
+    # Another backend re-embeds every title under its own name instead of reusing the vectors
+    other = VideoCatalog(OtherBackend(), db_path=db, refresh_seconds=0)
+    assert other.stats()["pending_embeddings"] == 12
+    assert other.search(BACK_PAIN) is not None
+    models = sqlite3.connect(db).execute(
+        "SELECT model, COUNT(*) FROM title_embeddings GROUP BY model ORDER BY model").fetchall()
+    assert models == [("HashingEmbeddingProvider", 12), ("other-backend", 12)]
+    assert VideoCatalog(HashingEmbeddingProvider(), db_path=db).stats()["pending_embeddings"] == 0
+
+
+def test_capped_catalog_database_and_restored_rows(tmp_path):
+    db = str(tmp_path / "videos.sqlite")
+    catalog = VideoCatalog(NotLoadedProvider(), db_path=db, min_results=1, max_entries=5, refresh_seconds=0)
+    catalog.add(back_pain_videos())
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM videos").fetchone() == (5,)
+
+    def fetch_stats(ids):  # bp4 was deleted on YouTube
+        return {i: {"statistics": {"viewCount": "1", "likeCount": "0"}} for i in ids if i != "bp4"}, 1
+
+    catalog.refresh_stats(fetch_stats, max_age=0)
+    assert "bp4" not in [v.video_id for v in catalog.search(BACK_PAIN)]
+    catalog.add(back_pain_videos()[4:6])  # bp4 is back, bp5 still does not fit
+    assert "bp4" in [v.video_id for v in catalog.search(BACK_PAIN)]
+    assert sqlite3.connect(db).execute("SELECT video_id, title FROM videos WHERE video_id IN ('bp4', 'bp5')"
+                                       ).fetchall() == [("bp4", "Back pain home remedies that work #4")]
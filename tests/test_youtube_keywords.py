@@ -0,0 +1,51 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from keyword_cache import KeywordCache
+from rate_limiter import RateLimiter
+from youtube_videos2 import YouTubeExtractor
+
+REPLY = json.dumps({"youtube_keywords": ["chest pain relief", "angina signs"],
+                    "medical_keywords": ["cardiologist", "heart hospital"]})
+
+
+class StubModel:
+    def __init__(self, text, chunk_chars=8):
+        self.text = text
+        self.chunk_chars = chunk_chars
+
+    def generate_content(self, prompt, stream=False):
+        return (SimpleNamespace(text=self.text[i:i + self.chunk_chars])
+                for i in range(0, len(self.text), self.chunk_chars))
+
+
+def extractor(text, engine):
+    return YouTubeExtractor(None, None, KeywordCache(), model=StubModel(text), youtube=object(),
+                            rate_limiter=RateLimiter(), keyword_engine=engine)
+
+
+def test_complete_reply_is_streamed_and_cached():
+    yt = extractor(REPLY, "gemini")
+    events = list(yt.stream_keywords("chest pain"))
+    assert [(field, source) for field, _, source in events] == [
+        ("youtube_keywords", "gemini"), ("medical_keywords", "gemini")]
+    assert yt.keyword_cache.get("chest pain") == (["chest pain relief", "angina signs"],
+                                                   ["cardiologist", "heart hospital"])
+
+
+def test_truncated_reply_fills_missing_list_locally_and_is_not_cached():
+    yt = extractor(REPLY[:REPLY.index("cardiologist")], "fallback")
+    events = list(yt.stream_keywords("chest pain"))
+    assert events[0] == ("youtube_keywords", ["chest pain relief", "angina signs"], "gemini")
+    field, values, source = events[1]
+    assert (field, source) == ("medical_keywords", "local") and values
+    assert yt.keyword_cache.get("chest pain") is None
+
+
+def test_truncated_reply_raises_without_fallback():
+    yt = extractor(REPLY[:REPLY.index("cardiologist")], "gemini")
+    with pytest.raises(ValueError):
+        yt.extract_keywords("chest pain")
+    assert yt.keyword_cache.get("chest pain") is None
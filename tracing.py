@@ -0,0 +1,169 @@
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("infohealth.trace")
+
+# Samples kept per span name for percentile estimates
+WINDOW_SIZE = 1024
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+class SpanStats:
+    def __init__(self, window: int = WINDOW_SIZE):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+
+    def add(self, seconds: float, error: bool):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.errors += int(error)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """Per-span latency aggregates (count, sum, errors, p50/p95 over a window)"""
+
+    def __init__(self):
+        self._spans: Dict[str, SpanStats] = {}
+        self._collectors: List[Callable[[], str]] = []
+        self._lock = threading.Lock()
+
+    def add_collector(self, collector: Callable[[], str]):
+        """Extra Prometheus text (e.g. rate limiter usage) appended to every scrape"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            self._spans.setdefault(name, SpanStats()).add(seconds, error)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                name: {
+                    "count": s.count,
+                    "errors": s.errors,
+                    "p50_ms": s.quantile(0.5) * 1000,
+                    "p95_ms": s.quantile(0.95) * 1000,
+                    "avg_ms": s.total / s.count * 1000 if s.count else 0.0,
+                }
+                for name, s in sorted(self._spans.items())
+            }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP infohealth_span_seconds Latency of named pipeline spans",
+            "# TYPE infohealth_span_seconds summary",
+        ]
+        with self._lock:
+            for name, s in sorted(self._spans.items()):
+                for q in (0.5, 0.95):
+                    lines.append(f'infohealth_span_seconds{{span="{name}",quantile="{q}"}} {s.quantile(q):.6f}')
+                lines.append(f'infohealth_span_seconds_sum{{span="{name}"}} {s.total:.6f}')
+                lines.append(f'infohealth_span_seconds_count{{span="{name}"}} {s.count}')
+            lines.append("# HELP infohealth_span_errors_total Spans that raised")
+            lines.append("# TYPE infohealth_span_errors_total counter")
+            for name, s in sorted(self._spans.items()):
+                lines.append(f'infohealth_span_errors_total{{span="{name}"}} {s.errors}')
+        text = "\n".join(lines) + "\n"
+        return text + "".join(collector() for collector in self._collectors)
+
+
+registry = MetricsRegistry()
+
+
+def new_trace(trace_id: Optional[str] = None) -> str:
+    """Start a trace for one user request; spans in this context carry its id"""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def current_trace() -> Optional[str]:
+    return _trace_id.get()
+
+
+def bind(fn):
+    """Wrap fn to run in a copy of the caller's context (trace id survives thread pools)"""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block; records to the registry and emits one JSON log line"""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        registry.record(name, seconds, error is not None)
+        if logger.isEnabledFor(logging.INFO):
+            record = {"span": name, "trace": _trace_id.get(), "ms": round(seconds * 1000, 3), **attrs}
+            if error is not None:
+                record["error"] = type(error).__name__
+            logger.info(json.dumps(record, default=str))
+
+
+def enable_json_logs(path: Optional[str] = None):
+    """Send span logs (one JSON object per line) to a file, or stderr if no path"""
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def write_prometheus(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(registry.render_prometheus())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve GET /metrics in Prometheus text format from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
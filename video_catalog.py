@@ -0,0 +1,349 @@
+import math
+import operator
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+
+from embedding_provider import EmbeddingProvider
+from local_keywords import load_specialty_map
+from results import VideoResult
+from symptom_gate import tokenize
+from tracing import span
+
+# How many relevant catalog videos a query needs before YouTube is skipped
+MIN_RESULTS = 10
+# Fraction of the query's keywords that must each have a relevant video
+MIN_COVERAGE = 0.5
+# Title relevance (cosine, or IDF-weighted share of keyword terms in the title) to count
+MIN_SIMILARITY = 0.55
+# Words that say nothing about the condition: they match titles about anything
+STOP_WORDS = frozenset((
+    "a an and are at by can for from how in is it of on or the to what when why with you your my "
+    "best tips guide video management care awareness relief signs"
+).split())
+# Same candidate pool size as the YouTube search call
+CANDIDATES = 25
+STATS_REFRESH_SECONDS = 6 * 3600
+
+StatsFetcher = Callable[[List[str]], tuple]
+
+
+def generic_tokens(templates: Iterable[str]) -> FrozenSet[str]:
+    """STOP_WORDS plus the fixed words of the local engine's YouTube templates
+    ("{term} home remedies" -> home, remedies)
+    """
+    words = {token for template in templates for token in tokenize(template.replace("{term}", ""))}
+    return STOP_WORDS | words
+
+
+class VideoCatalog:
+    """Searchable local catalog of videos already fetched from YouTube.
+
+    Every enriched search result (ID, title, views, likes) is kept together with
+    a MiniLM embedding of its title; thumbnail and URL derive from the ID. A
+    query's youtube_keywords are matched against titles by embedding similarity
+    and by token overlap (an inverted index, which also works before the model
+    has loaded). Either way a title only counts for a keyword if it contains
+    the keyword's most specific term, so "toothache home remedies" is never
+    answered with back-pain videos. When enough videos are relevant across
+    enough of the keywords, the catalog answers instead of a 100-unit
+    search().list call.
+
+    If db_path is set, videos and embeddings are kept in SQLite across restarts;
+    title embeddings are stored per embedder name (torch / ONNX backends), so
+    processes on different backends can share the file without mixing vectors.
+    View/like counts are refreshed in the background (1 unit per 50 videos).
+    """
+
+    def __init__(self, embedder: EmbeddingProvider, db_path: Optional[str] = None,
+                 min_results: int = MIN_RESULTS, min_coverage: float = MIN_COVERAGE,
+                 min_similarity: float = MIN_SIMILARITY, max_entries: int = 20000,
+                 refresh_seconds: float = STATS_REFRESH_SECONDS,
+                 generic: Optional[FrozenSet[str]] = None):
+        self.embedder = embedder
+        self.generic = generic if generic is not None else generic_tokens(
+            load_specialty_map()["youtube_templates"])
+        self.min_results = min_results
+        self.min_coverage = min_coverage
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._titles: List[str] = []
+        self._views: List[int] = []
+        self._likes: List[int] = []
+        self._updated: List[float] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._pending: List[int] = []  # rows whose title is not embedded yet
+        self._tokens: Dict[str, List[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+        self.counts = {"local": 0, "youtube": 0, "added": 0, "refreshed": 0, "removed": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS videos ("
+                "video_id TEXT PRIMARY KEY, title TEXT, views INTEGER, likes INTEGER, updated REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS title_embeddings ("
+                "video_id TEXT, model TEXT, embedding BLOB, PRIMARY KEY (video_id, model))"
+            )
+            self._db.commit()
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self):
+        # Titles without a vector from this embedder are embedded again
+        rows = self._db.execute(
+            "SELECT v.video_id, v.title, v.views, v.likes, v.updated, e.embedding FROM videos v "
+            "LEFT JOIN title_embeddings e ON e.video_id = v.video_id AND e.model = ? "
+            "ORDER BY v.updated DESC",
+            (self.embedder.name,)
+        ).fetchall()
+        for video_id, title, views, likes, updated, embedding in rows[:self.max_entries]:
+            row = self._append(video_id, title, views, likes, updated)
+            if embedding is not None:
+                self._set_vector(row, np.frombuffer(embedding, dtype=np.float32))
+            else:
+                self._pending.append(row)
+        if rows:
+            print(f"📼 Video catalog loaded: {len(self._ids)} videos")
+
+    def _append(self, video_id: str, title: str, views: int, likes: int, updated: float) -> int:
+        row = len(self._ids)
+        self._ids.append(video_id)
+        self._rows[video_id] = row
+        self._titles.append(title)
+        self._views.append(views)
+        self._likes.append(likes)
+        self._updated.append(updated)
+        for token in set(tokenize(title)):
+            self._tokens[token].append(row)
+        return row
+
+    def _set_vector(self, row: int, vector: np.ndarray):
+        norm = np.linalg.norm(vector)
+        if self._matrix is None:
+            self._matrix = np.zeros((max(64, row + 1), len(vector)), dtype=np.float32)
+        elif row >= len(self._matrix):
+            grown = np.zeros((max(row + 1, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+        self._matrix[row] = vector / norm if norm else vector
+
+    def _embed_pending(self):
+        # Never block a search on the model load; titles wait until MiniLM is up
+        if not self.embedder.loaded:
+            return
+        with self._lock:
+            rows, self._pending = self._pending, []
+            titles = [self._titles[row] for row in rows]
+        if not rows:
+            return
+        with span("video_catalog_embed", titles=len(rows)):
+            vectors = np.asarray(self.embedder.encode(titles), dtype=np.float32)
+        with self._lock:
+            for row, vector in zip(rows, vectors):
+                self._set_vector(row, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO title_embeddings (video_id, model, embedding) VALUES (?, ?, ?)",
+                    [(self._ids[row], self.embedder.name, self._matrix[row].tobytes()) for row in rows]
+                )
+                self._db.commit()
+
+    def add(self, videos: List[VideoResult]):
+        """Store enriched search results (new IDs appended, known ones updated,
+        rows dropped by refresh_stats restored). Past max_entries nothing new is
+        kept, in memory or in the database.
+        """
+        now = time.time()
+        with self._lock:
+            kept = []
+            for video in videos:
+                if video.views is None:
+                    continue
+                row = self._rows.get(video.video_id)
+                if row is not None:
+                    self._views[row], self._likes[row], self._updated[row] = video.views, video.likes, now
+                    if not self._titles[row] and video.title:
+                        # YouTube serves it again: make it matchable and re-embed its title
+                        self._titles[row] = video.title
+                        for token in set(tokenize(video.title)):
+                            self._tokens[token].append(row)
+                        self._pending.append(row)
+                elif len(self._ids) < self.max_entries:
+                    self._pending.append(self._append(video.video_id, video.title, video.views, video.likes, now))
+                    self.counts["added"] += 1
+                else:
+                    continue
+                kept.append((video.video_id, video.title, video.views, video.likes, now))
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT INTO videos (video_id, title, views, likes, updated) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(video_id) DO UPDATE SET views = excluded.views, "
+                    "likes = excluded.likes, updated = excluded.updated",
+                    kept
+                )
+                self._db.commit()
+        self._embed_pending()
+
+    def _embed_query(self, youtube_keywords: List[str]) -> Optional[np.ndarray]:
+        if self._matrix is None or not self.embedder.loaded:
+            return None
+        query = np.asarray(self.embedder.encode(list(youtube_keywords)), dtype=np.float32)
+        norms = np.linalg.norm(query, axis=1, keepdims=True)
+        return query / np.where(norms == 0, 1.0, norms)
+
+    def _idf(self, token: str) -> float:
+        return math.log((1 + len(self._ids)) / (1 + len(self._tokens.get(token, ())))) + 1.0
+
+    def _relevance(self, youtube_keywords: List[str], query: Optional[np.ndarray]) -> np.ndarray:
+        """(n_videos, n_keywords) title relevance: cosine for embedded titles,
+        IDF-weighted share of the keyword's terms (generic words dropped) for the
+        rest; zero unless the title contains the keyword's most specific term
+        """
+        n = len(self._ids)
+        lexical = np.zeros((n, len(youtube_keywords)), dtype=np.float32)
+        required = np.zeros((n, len(youtube_keywords)), dtype=bool)
+        for j, keyword in enumerate(youtube_keywords):
+            weights = {token: self._idf(token) for token in tokenize(keyword) if token not in self.generic}
+            if not weights:
+                continue  # nothing but template words: no title can be judged relevant
+            total = sum(weights.values())
+            for token, weight in weights.items():
+                rows = self._tokens.get(token)
+                if rows:
+                    lexical[rows, j] += weight / total
+            rows = self._tokens.get(max(weights, key=weights.get))
+            if rows:
+                required[rows, j] = True
+        if query is None:
+            return np.where(required, lexical, 0.0)
+        embedded = np.zeros(n, dtype=bool)
+        embedded[:min(n, len(self._matrix))] = True
+        embedded[self._pending] = False
+        vectors = self._matrix[:n]
+        if len(vectors) < n:  # newest rows not allocated yet
+            vectors = np.vstack([vectors, np.zeros((n - len(vectors), vectors.shape[1]), dtype=np.float32)])
+        relevance = np.where(embedded[:, None], vectors @ query.T, lexical)
+        return np.where(required, relevance, 0.0)
+
+    def search(self, youtube_keywords: List[str], k: int = 10) -> Optional[List[VideoResult]]:
+        """Top k videos like the YouTube path (relevant pool ranked by score), or
+        None when coverage is too thin and YouTube should be asked
+        """
+        if not youtube_keywords or not self._ids:
+            with self._lock:
+                self.counts["youtube"] += 1
+            return None
+        self._embed_pending()
+        with span("video_catalog_search", keywords=len(youtube_keywords)) as attrs:
+            query = self._embed_query(youtube_keywords)
+            with self._lock:
+                return self._search(youtube_keywords, query, k, attrs)
+
+    def _search(self, youtube_keywords: List[str], query: Optional[np.ndarray], k: int,
+                attrs: dict) -> Optional[List[VideoResult]]:
+        relevance = self._relevance(youtube_keywords, query)
+        relevant = relevance >= self.min_similarity
+        coverage = relevant.any(axis=0).mean()
+        best = relevance.max(axis=1)
+        candidates = np.flatnonzero(best >= self.min_similarity)
+        attrs.update(relevant=len(candidates), coverage=round(float(coverage), 2))
+        if len(candidates) < self.min_results or coverage < self.min_coverage:
+            self.counts["youtube"] += 1
+            return None
+        # Search relevance picks the pool, engagement score orders it (as with YouTube)
+        pool = candidates[np.argsort(-best[candidates], kind="stable")][:CANDIDATES]
+        videos = [
+            VideoResult(self._ids[row], self._titles[row], self._views[row], self._likes[row],
+                        self._views[row] + self._likes[row] * 2)
+            for row in pool
+        ]
+        self.counts["local"] += 1
+        return sorted(videos, key=operator.attrgetter('score'), reverse=True)[:k]
+
+    def refresh_stats(self, fetch_stats: StatsFetcher, max_age: Optional[float] = None) -> int:
+        """Re-fetch views/likes for videos older than max_age (default: refresh_seconds).
+        Videos YouTube no longer returns are dropped from answers. Returns videos refreshed.
+        """
+        max_age = self.refresh_seconds if max_age is None else max_age
+        with self._lock:
+            cutoff = time.time() - max_age
+            stale = [video_id for video_id, updated in zip(self._ids, self._updated) if updated <= cutoff]
+        if not stale:
+            return 0
+        stats_by_id, _ = fetch_stats(stale)
+        now = time.time()
+        updates, removed = [], []
+        with self._lock:
+            for video_id in stale:
+                row = self._rows[video_id]
+                item = stats_by_id.get(video_id)
+                if item is None:
+                    # deleted / private: keep the row, never match it again
+                    for token in set(tokenize(self._titles[row])):
+                        self._tokens[token].remove(row)
+                    self._titles[row] = ""
+                    self._updated[row] = float("inf")
+                    if self._matrix is not None and row < len(self._matrix):
+                        self._matrix[row] = 0.0
+                    removed.append((video_id,))
+                    continue
+                stats = item["statistics"]
+                self._views[row] = int(stats.get("viewCount", 0))
+                self._likes[row] = int(stats.get("likeCount", 0))
+                self._updated[row] = now
+                updates.append((self._views[row], self._likes[row], now, video_id))
+            self.counts["refreshed"] += len(updates)
+            self.counts["removed"] += len(removed)
+            if self._db is not None:
+                self._db.executemany("UPDATE videos SET views = ?, likes = ?, updated = ? WHERE video_id = ?",
+                                     updates)
+                self._db.executemany("DELETE FROM videos WHERE video_id = ?", removed)
+                self._db.executemany("DELETE FROM title_embeddings WHERE video_id = ?", removed)
+                self._db.commit()
+        print(f"📼 Video catalog stats refreshed: {len(updates)} updated, {len(removed)} removed")
+        return len(updates)
+
+    def start_refresher(self, fetch_stats: StatsFetcher):
+        """Daemon thread running refresh_stats every refresh_seconds"""
+        if self._refresher is not None or not self.refresh_seconds:
+            return
+
+        def loop():
+            while not self._stop.wait(self.refresh_seconds):
+                try:
+                    self.refresh_stats(fetch_stats)
+                except Exception as e:
+                    # quota / network trouble: try again next round
+                    print(f"⚠️ Video catalog refresh failed ({type(e).__name__}: {e})")
+
+        self._refresher = threading.Thread(target=loop, name="video-catalog-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.counts["local"] + self.counts["youtube"]
+            oldest = min((u for u in self._updated if u != float("inf")), default=None)
+            return {
+                **self.counts,
+                "local_rate": self.counts["local"] / total if total else 0.0,
+                "size": len(self._ids),
+                "pending_embeddings": len(self._pending),
+                "oldest_stats_h": (time.time() - oldest) / 3600 if oldest is not None else 0.0,
+            }
@@ -1,17 +1,116 @@
 import google.generativeai as genai
 import googleapiclient.discovery
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple, Any
 import operator
+import time
+
+from keyword_cache import KeywordCache
+from tracing import span
+from rate_limiter import RateLimiter, GEMINI, YOUTUBE, get_rate_limiter
+from local_keywords import LocalKeywordExtractor, ENGINES
+from results import VideoResult, intern_all
+from json_stream import IncrementalJSONParser
+from video_catalog import VideoCatalog
+
+# videos().list accepts at most 50 comma-separated IDs per request
+STATS_BATCH_SIZE = 50
+# YouTube Data API quota units per call (10,000/day by default)
+SEARCH_COST = 100
+VIDEOS_LIST_COST = 1
+# Members of the Gemini keyword reply, in the order the prompt asks for them
+KEYWORD_FIELDS = ("youtube_keywords", "medical_keywords")
 
 class YouTubeExtractor:
-    def __init__(self, gemini_key: str, yt_key: str):
-        genai.configure(api_key=gemini_key)
-        self.model = genai.GenerativeModel("models/gemini-2.5-flash")
-        self.youtube = googleapiclient.discovery.build('youtube', 'v3', developerKey=yt_key)
+    def __init__(self, gemini_key: str, yt_key: str, keyword_cache: KeywordCache = None,
+                 model=None, youtube=None, rate_limiter: RateLimiter = None,
+                 keyword_engine: str = "gemini", local_extractor: LocalKeywordExtractor = None,
+                 video_catalog: VideoCatalog = None):
+        # model / youtube can be injected (e.g. recorded-response clients in benchmarks)
+        # keyword_engine: "gemini" only, "local" only, "local_first" (Gemini when
+        # the local map recognises nothing) or "fallback" (local when Gemini fails)
+        if keyword_engine not in ENGINES:
+            raise ValueError(f"keyword_engine must be one of {ENGINES}")
+        if keyword_engine != "gemini" and local_extractor is None:
+            local_extractor = LocalKeywordExtractor()
+        if model is None:
+            genai.configure(api_key=gemini_key)
+            model = genai.GenerativeModel("models/gemini-2.5-flash")
+        self.model = model
+        self.youtube = youtube or googleapiclient.discovery.build('youtube', 'v3', developerKey=yt_key)
+        # Shared per-process by default so breakers/budgets see every session's calls
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.keyword_cache = keyword_cache or KeywordCache()
+        self.keyword_engine = keyword_engine
+        self.local_extractor = local_extractor
+        # Answers well-covered queries from past results instead of a 100-unit search
+        self.video_catalog = video_catalog
+        if video_catalog is not None:
+            video_catalog.start_refresher(self._fetch_video_stats)
+
+    def _fetch_video_stats(self, video_ids: List[str]) -> tuple[Dict[str, Dict], int]:
+        """Fetch statistics+snippet for all IDs in chunked multi-ID requests.
+        Returns: {video_id: item}, number of videos().list calls made
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        stats_by_id = {}
+        calls = 0
+        for start in range(0, len(unique_ids), STATS_BATCH_SIZE):
+            chunk = unique_ids[start:start + STATS_BATCH_SIZE]
+            with self.rate_limiter.guard(YOUTUBE, cost=VIDEOS_LIST_COST), \
+                    span("youtube_stats", ids=len(chunk)):
+                stats_response = self.youtube.videos().list(
+                    part='statistics,snippet', id=','.join(chunk)
+                ).execute()
+            calls += 1
+            for item in stats_response.get('items', []):
+                stats_by_id[item['id']] = item
+        return stats_by_id, calls
     
-    def symptom_to_videos(self, user_symptoms: str) -> tuple[List[Dict], List[str], List[str]]:
-        """Returns: videos, youtube_keywords, medical_keywords"""
-        
+    def extract_keywords(self, user_symptoms: str) -> tuple[List[str], List[str]]:
+        """Returns: youtube_keywords, medical_keywords (served from cache when possible)"""
+        keywords = {field: values for field, values, _ in self.stream_keywords(user_symptoms)}
+        return keywords["youtube_keywords"], keywords["medical_keywords"]
+
+    def stream_keywords(self, user_symptoms: str) -> Iterator[Tuple[str, List[str], str]]:
+        """Yields ("youtube_keywords", [...], source) and ("medical_keywords", [...],
+        source), each as soon as it is known: with Gemini, while the rest of the
+        reply streams in. source is "cache", "gemini" or "local" (offline engine,
+        including the fallback), so callers can avoid caching local keywords.
+        """
+        cached = self.keyword_cache.get(user_symptoms)
+        if cached is not None:
+            print(f"⚡ Keyword cache hit: {self.keyword_cache.stats()}")
+            for field, values in zip(KEYWORD_FIELDS, cached):
+                yield field, values, "cache"
+            return
+
+        if self.keyword_engine in ("local", "local_first"):
+            local = self.local_extractor.extract(user_symptoms, use_default=self.keyword_engine == "local")
+            if local is not None:
+                print(f"🧭 Local keywords: {local}")
+                for field, values in zip(KEYWORD_FIELDS, local):
+                    yield field, values, "local"
+                return
+
+        keywords = {}
+        try:
+            for field, values in self._stream_gemini_keywords(user_symptoms):
+                keywords[field] = values
+                yield field, values, "gemini"
+        except Exception as e:
+            if self.keyword_engine != "fallback":
+                raise
+            # Quota exhausted, SSL/network trouble, unparseable reply: degrade, don't fail.
+            # Lists already streamed from Gemini stand; local keywords fill the rest.
+            print(f"⚠️ Gemini keyword extraction failed ({type(e).__name__}: {e}), using local keywords")
+            for field, values in zip(KEYWORD_FIELDS, self.local_extractor.extract(user_symptoms)):
+                if field not in keywords:
+                    yield field, values, "local"
+            return
+
+        self.keyword_cache.put(user_symptoms, keywords["youtube_keywords"], keywords["medical_keywords"])
+
+    def _stream_gemini_keywords(self, user_symptoms: str) -> Iterator[Tuple[str, List[str]]]:
         # SINGLE Gemini call - extract BOTH keyword types
         prompt = f"""
     You are a medical keyword extraction system.
@@ -25,57 +124,114 @@ class YouTubeExtractor:
     {{"youtube_keywords": ["keyword1", "keyword2"], "medical_keywords": ["clinic1", "clinic2"]}}
     """
         
-        response = self.model.generate_content(prompt)
-        # Parse JSON response
-        import json
-        import re
-
-        response_text = response.text.strip()
-        print(f"🎯 Gemini response: {response_text[:200]}...")
-
-        # Extract JSON from ```json ... ``` markdown
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-            keyword_data = json.loads(json_str)
-            print("✅ Regex JSON extracted!")
-        else:
-            # Fallback if no markdown
-            keyword_data = json.loads(response_text)
-            print("✅ Direct JSON parsed!")
-
-        youtube_keywords = keyword_data.get("youtube_keywords", [])
-        medical_keywords = keyword_data.get("medical_keywords", [])
+        # Streamed: each keyword list is parsed (```json fences and all) as soon as
+        # its closing bracket arrives, so searches start before the reply ends
+        parser = IncrementalJSONParser()
+        emitted = set()
+        started = time.perf_counter()
+        with self.rate_limiter.guard(GEMINI), span("gemini_generate", stream=True) as attrs:
+            chunks = 0
+            for chunk in self.model.generate_content(prompt, stream=True):
+                chunks += 1
+                for field, values in parser.feed(self._chunk_text(chunk)):
+                    if field in KEYWORD_FIELDS and field not in emitted:
+                        emitted.add(field)
+                        attrs[f"{field}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                        # Interned: the same keywords recur across sessions and cached results
+                        yield field, intern_all(values)
+            attrs["chunks"] = chunks
+        print(f"🎯 Gemini response ({chunks} chunks): {parser.text.strip()[:200]}...")
+
+        # Reply never closed its object: whole-text parse, as before streaming.
+        # A list that never arrived (truncated reply) is an error, not [] -- the
+        # fallback fills it locally and nothing partial reaches the keyword cache
+        keyword_data = parser.close()
+        for field in KEYWORD_FIELDS:
+            if field not in emitted:
+                values = keyword_data.get(field)
+                if not isinstance(values, list) or not values:
+                    raise ValueError(f"Gemini reply has no {field}")
+                yield field, intern_all(values)
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        try:
+            return chunk.text
+        except ValueError:
+            # chunk without text parts (e.g. a bare finish_reason / safety chunk)
+            return ""
+
+    def symptom_to_videos(self, user_symptoms: str) -> tuple[List[VideoResult], List[str], List[str]]:
+        """Returns: videos, youtube_keywords, medical_keywords"""
+        youtube_keywords, medical_keywords = self.extract_keywords(user_symptoms)
         
         print(f"🎯 YouTube: {' | '.join(youtube_keywords[:5])}")
         print(f"🏥 Medical: {' | '.join(medical_keywords[:5])}")
         
-        # Continue with YouTube search using youtube_keywords (unchanged)
+        return self.search_videos(youtube_keywords), youtube_keywords, medical_keywords  # Return 3 items!
+
+    def stream_videos(self, user_symptoms: str) -> Iterator[Tuple[str, Any]]:
+        """Progressive version of symptom_to_videos. Yields, in order:
+        ("keywords", (youtube_keywords, medical_keywords))
+        ("provisional", videos in search relevance order, no stats yet)
+        ("final", top 10 videos enriched with stats and re-ranked by score)
+        """
+        youtube_keywords, medical_keywords = self.extract_keywords(user_symptoms)
+        yield "keywords", (youtube_keywords, medical_keywords)
+        yield from self.stream_search_videos(youtube_keywords)
+
+    def search_videos(self, youtube_keywords: List[str]) -> List[VideoResult]:
+        """YouTube search + stats for already-extracted keywords -> top 10 videos"""
+        videos = []
+        for stage, payload in self.stream_search_videos(youtube_keywords):
+            videos = payload
+        return videos
+
+    def stream_search_videos(self, youtube_keywords: List[str]) -> Iterator[Tuple[str, List[VideoResult]]]:
+        """Yields ("provisional", search hits) then ("final", top 10 videos);
+        only ("final", ...) when the video catalog answers locally
+        """
+        if self.video_catalog is not None:
+            local = self.video_catalog.search(youtube_keywords)
+            if local is not None:
+                print(f"📼 Video catalog hit: {len(local)} videos, no YouTube call")
+                yield "final", local
+                return
+
         query = ' '.join(youtube_keywords)
-        # ... rest of your existing YouTube code ...
-        search_response = self.youtube.search().list(
-            q=query, part='id,snippet', maxResults=25, type='video', order='relevance'
-        ).execute()
+        with self.rate_limiter.guard(YOUTUBE, cost=SEARCH_COST), span("youtube_search"):
+            search_response = self.youtube.search().list(
+                q=query, part='id,snippet', maxResults=25, type='video', order='relevance'
+            ).execute()
         
+        items = search_response.get('items', [])
+        video_ids = [item['id']['videoId'] for item in items]
+        yield "provisional", [self._provisional_video(item) for item in items[:10]]
+
+        # Per-request count goes on the trace: the extractor is shared by concurrent sessions
+        with span("youtube_enrich", ids=len(video_ids)) as attrs:
+            stats_by_id, stats_calls = self._fetch_video_stats(video_ids)
+            attrs["api_calls"] = 1 + stats_calls
+        print(f"📊 YouTube API calls: {1 + stats_calls} (1 search + {stats_calls} stats)")
+
         videos = []
-        for item in search_response.get('items', []):
-            video_id = item['id']['videoId']
-            stats_response = self.youtube.videos().list(part='statistics,snippet', id=video_id).execute()
-            
-            if stats_response['items']:
-                stats = stats_response['items'][0]['statistics']
-                snippet = stats_response['items'][0]['snippet']
-                thumbnail = snippet.get('thumbnails', {}).get('medium', {}).get('url', '')
-                
-                videos.append({
-                    'title': snippet['title'][:70] + '...',
-                    'url': f"https://www.youtube.com/watch?v={video_id}",
-                    'video_id': video_id,
-                    'thumbnail': thumbnail,
-                    'views': int(stats.get('viewCount', 0)),
-                    'likes': int(stats.get('likeCount', 0)),
-                    'score': int(stats.get('viewCount', 0)) + int(stats.get('likeCount', 0)) * 2
-                })
+        for video_id in video_ids:
+            item = stats_by_id.get(video_id)
+            if item:
+                stats = item['statistics']
+                snippet = item['snippet']
+                views = int(stats.get('viewCount', 0))
+                likes = int(stats.get('likeCount', 0))
+                # url / thumbnail are derived from video_id on access
+                videos.append(VideoResult(video_id, snippet['title'][:70] + '...', views, likes, views + likes * 2))
         
-        top_videos = sorted(videos, key=operator.itemgetter('score'), reverse=True)[:10]
-        return top_videos, youtube_keywords, medical_keywords  # Return 3 items!
+        yield "final", sorted(videos, key=operator.attrgetter('score'), reverse=True)[:10]
+        if self.video_catalog is not None:
+            # every enriched hit, not just the top 10, so coverage grows faster
+            self.video_catalog.add(videos)
+
+    @staticmethod
+    def _provisional_video(item: Dict) -> VideoResult:
+        """Search hit shaped like a final video, with stats still unknown (None)"""
+        snippet = item.get('snippet', {})
+        return VideoResult(item['id']['videoId'], snippet.get('title', '')[:70] + '...')